@@ -0,0 +1,69 @@
+"""
+Сравнение прежнего разбора published_at (split('+') и to_datetime) с разбором parse_published_at.
+
+Запуск из корня проекта:
+    python benchmarks/date_parsing.py --rows 10000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main.dates import parse_published_at
+
+
+def make_values(rows, seed=0, distinct=500000):
+    """
+    Синтетические даты публикации 2003-2024 годов: в основном +0300,
+    немного других смещений, в том числе отрицательных, и пропуски
+    """
+    rng = np.random.default_rng(seed)
+    seconds = rng.integers(pd.Timestamp('2003-01-01').timestamp(), pd.Timestamp('2024-12-31').timestamp(), distinct)
+    offsets = rng.choice(['+0300', '+0500', '+0000', '-0500'], distinct, p=[0.85, 0.1, 0.04, 0.01])
+    local = pd.Series(pd.to_datetime(seconds, unit='s')).dt.strftime('%Y-%m-%dT%H:%M:%S')
+    pool = (local + offsets).to_numpy(dtype=object)
+    values = pool[rng.integers(0, distinct, rows)]
+    values[rng.random(rows) < 0.001] = None
+    return pd.Series(values, dtype='str')
+
+
+def legacy_parse(values):
+    """Прежний разбор из DataProcessor._parse_frame"""
+    published_at = pd.to_datetime(values.str.split('+').str[0], format='%Y-%m-%dT%H:%M:%S', errors='coerce')
+    return published_at, published_at.dt.year.astype('Int16')
+
+
+def measure(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000000)
+    args = parser.parse_args()
+
+    values = make_values(args.rows)
+    (old_dates, old_years), old = measure(lambda: legacy_parse(values))
+    (new_dates, new_years), new = measure(lambda: parse_published_at(values))
+
+    # Там, где прежний разбор справлялся, годы совпадают
+    parsed = old_years.notna()
+    pd.testing.assert_series_equal(new_years[parsed], old_years[parsed])
+
+    print(f'rows:       {args.rows}')
+    print(f'NaT before: {old_dates.isna().sum()}')
+    print(f'NaT after:  {new_dates.isna().sum()}')
+    print(f'split+to_datetime: {old:.3f} s')
+    print(f'parse_published_at: {new:.3f} s')
+    print(f'speedup:    {old / new:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,297 @@
+"""
+Замер этапов обработки вакансий на синтетических CSV нескольких размеров.
+
+Этапы DataProcessor: чтение CSV, разбор дат, конвертация зарплат, загрузка
+целиком, агрегаты зарплат, географии и навыков, отрисовка графиков;
+затем запись в БД командой process_data. Результаты сохраняются в JSON
+с хэшем коммита, чтобы сравнивать их между коммитами.
+
+Запуск из корня проекта:
+    python benchmarks/pipeline.py --sizes 10000 100000 1000000
+    python benchmarks/pipeline.py --baseline benchmarks/results/<коммит>.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ulearnsite.settings')
+# Замеры не должны трогать общий файловый кэш страниц
+os.environ.setdefault('CACHE_BACKEND', 'locmem')
+
+import django
+
+django.setup()
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import override_settings
+
+from main import utils
+from main.currency import CURRENCY_RATES
+from main.management.commands import process_data
+from main.utils import DataProcessor
+
+# Названия вакансий: (название, вес); PHP - около 8% вакансий
+NAMES = [
+    ('PHP-программист', 3), ('Senior PHP Developer', 2), ('Backend разработчик (PHP)', 2),
+    ('Python-разработчик', 6), ('Java Developer', 6), ('Frontend-разработчик', 8),
+    ('Программист 1С', 7), ('Аналитик данных', 5), ('Тестировщик', 6), ('DevOps-инженер', 4),
+    ('Менеджер проектов', 10), ('Системный администратор', 8), ('Бухгалтер', 12),
+    ('Менеджер по продажам', 15), ('Дизайнер', 6),
+]
+GRADES = ['', 'Junior ', 'Middle ', 'Senior ', 'Ведущий ']
+
+# Города: крупные с явными долями, остальное - длинный хвост
+CITIES = [
+    ('Москва', 0.35), ('Санкт-Петербург', 0.14), ('Екатеринбург', 0.04), ('Новосибирск', 0.04),
+    ('Казань', 0.03), ('Нижний Новгород', 0.03), ('Краснодар', 0.03), ('Алматы', 0.02),
+    ('Минск', 0.02), ('Самара', 0.02),
+]
+TAIL_CITIES = 300
+
+# Валюты: почти все зарплаты в рублях
+CURRENCIES = [('RUR', 0.92), ('USD', 0.035), ('EUR', 0.01), ('KZT', 0.02), ('BYR', 0.008), ('UAH', 0.007)]
+
+# Частые навыки; дальше - синтетический хвост с распределением Ципфа
+SKILLS = [
+    'Git', 'SQL', 'JavaScript', 'PHP', 'Python', 'Linux', 'MySQL', 'PostgreSQL', 'Docker', 'HTML',
+    'CSS', 'Английский язык', 'Java', '1С', 'Деловое общение', 'Работа в команде', 'Laravel',
+    'Django', 'React', 'Kubernetes', 'Excel', 'Управление проектами', 'Symfony', 'Redis', 'Nginx',
+]
+TAIL_SKILLS = 2000
+
+# Смещения времени публикации: в основном Москва
+OFFSETS = [('+0300', 0.85), ('+0500', 0.06), ('+0600', 0.04), ('+0700', 0.03), ('+0200', 0.02)]
+
+# Функции main.utils, вызовы которых замеряются как отдельные этапы: этап -> функция
+WRAPPED = {
+    'date_parse': 'parse_published_at',
+    'salary_conversion': 'convert_salaries_to_rub',
+    'graph_rendering': 'render_charts',
+}
+
+# Порядок этапов в результатах; load включает read, date_parse и salary_conversion,
+# graphs - graph_rendering, process_data - db_write
+STAGES = [
+    'read', 'date_parse', 'salary_conversion', 'load', 'skill_aggregation', 'salary_aggregation',
+    'geography_aggregation', 'graph_rendering', 'graphs', 'db_write', 'process_data',
+]
+
+
+def _choice(rng, pairs, size):
+    values, weights = zip(*pairs)
+    weights = np.asarray(weights, dtype='float64')
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size, p=weights / weights.sum())]
+
+
+def generate_vacancies(rows, seed=0):
+    """Синтетические вакансии в схеме CSV (7 столбцов) с реалистичными распределениями"""
+    rng = np.random.default_rng(seed)
+
+    names = _choice(rng, [(grade, 1) for grade in GRADES], rows) + _choice(rng, NAMES, rows)
+    # Часть названий уникальна, как в выгрузках hh.ru
+    unique = rng.random(rows) < 0.2
+    names[unique] = names[unique] + [f' ({i})' for i in rng.integers(0, rows, unique.sum())]
+
+    # Навыки: 0-10 на вакансию, частые навыки встречаются чаще хвоста
+    vocabulary = np.asarray(SKILLS + [f'Skill {i}' for i in range(TAIL_SKILLS)], dtype=object)
+    lengths = np.minimum(rng.poisson(4, rows), 10)
+    lengths[rng.random(rows) < 0.2] = 0
+    ids = np.minimum(rng.zipf(1.3, lengths.sum()) - 1, len(vocabulary) - 1)
+    skills = np.split(vocabulary[ids], np.cumsum(lengths)[:-1])
+    key_skills = np.array(['\n'.join(row) if len(row) else None for row in skills], dtype=object)
+
+    # Зарплата указана у половины вакансий, в валюте - по курсу
+    currency = _choice(rng, CURRENCIES, rows)
+    rates = pd.Series(currency).map(CURRENCY_RATES).to_numpy(dtype='float64')
+    salary_from = np.round(rng.lognormal(np.log(70000), 0.6, rows) / rates, -2)
+    salary_to = np.round(salary_from * rng.uniform(1.1, 1.7, rows), -2)
+    salary_from[rng.random(rows) < 0.25] = np.nan
+    salary_to[rng.random(rows) < 0.4] = np.nan
+    no_salary = rng.random(rows) < 0.5
+    salary_from[no_salary] = salary_to[no_salary] = np.nan
+    currency[no_salary] = None
+
+    cities = CITIES + [(f'Город {i}', 0.2 / TAIL_CITIES) for i in range(TAIL_CITIES)]
+
+    # Даты 2003-2024, число вакансий растёт с годами; строки берутся из пула
+    distinct = min(rows, 200000)
+    start, end = pd.Timestamp('2003-01-01').timestamp(), pd.Timestamp('2024-12-31').timestamp()
+    seconds = start + (end - start) * np.sqrt(rng.random(distinct))
+    local = pd.Series(pd.to_datetime(seconds, unit='s')).dt.strftime('%Y-%m-%dT%H:%M:%S')
+    pool = (local + _choice(rng, OFFSETS, distinct)).to_numpy(dtype=object)
+
+    return pd.DataFrame({
+        'name': names,
+        'key_skills': key_skills,
+        'salary_from': salary_from,
+        'salary_to': salary_to,
+        'salary_currency': currency,
+        'area_name': _choice(rng, cities, rows),
+        'published_at': pool[rng.integers(0, distinct, rows)],
+    })
+
+
+def write_vacancies(path, rows, seed=0):
+    """Запись синтетических вакансий в CSV без заголовка, как выгрузка"""
+    generate_vacancies(rows, seed).to_csv(path, header=False, index=False, float_format='%.0f')
+    return os.path.getsize(path)
+
+
+@contextmanager
+def stage(timings, name):
+    """Добавление времени блока к этапу name"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+def timed(timings, name, func):
+    """Функция func, время вызовов которой копится в этапе name"""
+    def wrapper(*args, **kwargs):
+        with stage(timings, name):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def run_size(rows, directory, seed=0, render_workers=1):
+    """Замер всех этапов на CSV из rows вакансий"""
+    csv_path = os.path.join(directory, f'vacancies_{rows}.csv')
+    csv_bytes = write_vacancies(csv_path, rows, seed)
+    timings = {}
+
+    # Этапы внутри конструктора замеряются обёртками, код обработки не меняется
+    with ExitStack() as stack:
+        stack.enter_context(mock.patch.object(
+            DataProcessor, '_read_csv', staticmethod(timed(timings, 'read', DataProcessor._read_csv))
+        ))
+        for name, function in WRAPPED.items():
+            stack.enter_context(mock.patch.object(utils, function, timed(timings, name, getattr(utils, function))))
+        stack.enter_context(override_settings(MEDIA_ROOT=os.path.join(directory, f'media_{rows}')))
+
+        with stage(timings, 'load'):
+            processor = DataProcessor(csv_path)
+        # Навыки первыми: их счётчики потом переиспользуют агрегаты квантилей
+        with stage(timings, 'skill_aggregation'):
+            processor.process_skills()
+            processor.process_top_skills()
+        # Квантили считаются по полным агрегатам, в том числе по городам
+        with stage(timings, 'salary_aggregation'):
+            processor.process_salary_statistics()
+            processor.process_salary_quantiles()
+            processor.process_profession_statistics()
+        with stage(timings, 'geography_aggregation'):
+            processor.process_geography_data()
+            processor.process_geography_by_year()
+        with stage(timings, 'graphs'):
+            processor.create_all_graphs(workers=render_workers)
+        memory = processor.memory_usage()
+        del processor
+
+    # Команда целиком без графиков (они замерены выше) и отдельно запись в БД
+    writes = {}
+    publish = process_data.publish_dataset
+
+    def publish_counted(*args, **kwargs):
+        dataset, saved, elapsed = publish(*args, **kwargs)
+        writes['rows'] = saved
+        return dataset, saved, elapsed
+
+    with mock.patch.object(process_data, 'publish_dataset', timed(timings, 'db_write', publish_counted)):
+        with stage(timings, 'process_data'):
+            call_command('process_data', csv_path, '--no-graphs', '--no-cache', stdout=io.StringIO())
+
+    os.remove(csv_path)
+    return {
+        'rows': rows,
+        'csv_bytes': csv_bytes,
+        'memory_bytes': memory,
+        'db_rows': writes.get('rows', 0),
+        'stages': {name: round(timings[name], 4) for name in STAGES if name in timings},
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    """Таблица времени этапов; с baseline - отношение к прежним замерам"""
+    previous = {run['rows']: run['stages'] for run in (baseline or {}).get('runs', [])}
+    for run in results['runs']:
+        print(f"rows: {run['rows']}, csv: {run['csv_bytes'] / 2**20:.1f} MiB, "
+              f"memory: {run['memory_bytes'] / 2**20:.1f} MiB, db rows: {run['db_rows']}")
+        for name, seconds in run['stages'].items():
+            line = f'  {name:<22}{seconds:>10.3f} s'
+            before = previous.get(run['rows'], {}).get(name)
+            if before:
+                line += f'  {seconds / before:>6.2f}x'
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--render-workers', type=int, default=1)
+    parser.add_argument('--output', default=None, help='JSON file (default: benchmarks/results/<commit>.json)')
+    parser.add_argument('--baseline', default=None, help='JSON file of an earlier run to compare with')
+    args = parser.parse_args()
+
+    commit = git_commit()
+    output = args.output or os.path.join(ROOT, 'benchmarks', 'results', f'{commit or "unknown"}.json')
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Отдельная файловая БД SQLite, рабочая db.sqlite3 не меняется
+        connection.settings_dict['TEST']['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            runs = [run_size(rows, directory, args.seed, args.render_workers) for rows in args.sizes]
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    results = {
+        'commit': commit,
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'cpus': os.cpu_count(),
+        'seed': args.seed,
+        'runs': runs,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+    print(f'results: {output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Сравнение построчной и векторной конвертации зарплат в рубли.
+
+Запуск из корня проекта:
+    python benchmarks/salary_conversion.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main.currency import CURRENCY_RATES, StaticCurrencyRates
+from main.utils import convert_salaries_to_rub, convert_salary_to_rub
+
+
+def make_frame(rows, seed=0):
+    """Синтетические зарплаты с пропусками, нулями и неизвестными валютами"""
+    rng = np.random.default_rng(seed)
+    salary_from = rng.integers(10000, 300000, rows).astype('float64')
+    salary_to = salary_from + rng.integers(0, 100000, rows)
+    salary_from[rng.random(rows) < 0.3] = np.nan
+    salary_to[rng.random(rows) < 0.4] = np.nan
+    salary_from[rng.random(rows) < 0.01] = 0
+    currencies = np.array(list(CURRENCY_RATES) + ['XXX'], dtype=object)
+    weights = np.array([0.04, 0.01, 0.85, 0.02, 0.03, 0.02, 0.01, 0.01, 0.01])
+    currency = currencies[rng.choice(len(currencies), rows, p=weights)]
+    currency[rng.random(rows) < 0.05] = None
+    return pd.DataFrame({
+        'salary_from': salary_from,
+        'salary_to': salary_to,
+        'salary_currency': currency,
+        'published_at': pd.NaT,
+    })
+
+
+def measure(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    expected, row_wise = measure(
+        lambda: df.apply(convert_salary_to_rub, axis=1, args=(CURRENCY_RATES,))
+    )
+    actual, vectorized = measure(lambda: convert_salaries_to_rub(df, StaticCurrencyRates()))
+    pd.testing.assert_series_equal(actual, expected.astype('float64'))
+
+    print(f'rows:       {args.rows}')
+    print(f'row-wise:   {row_wise:.3f} s')
+    print(f'vectorized: {vectorized:.3f} s')
+    print(f'speedup:    {row_wise / vectorized:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
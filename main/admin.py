@@ -1,6 +1,10 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import MainPage, SalaryStatistics, GeographyData, Skill, Graph, LastVacancy
+from .models import (
+    MainPage, Dataset, SalaryStatistics, GeographyData, Skill, Graph, LastVacancy,
+    Profession, ProfessionStatistics, IngestedFile,
+)
+from .storage import activate_dataset
 
 @admin.register(MainPage)
 class MainPageAdmin(admin.ModelAdmin):
@@ -12,31 +16,43 @@ class MainPageAdmin(admin.ModelAdmin):
         return "Нет изображения"
     display_image.short_description = 'Изображение'
 
+@admin.register(Dataset)
+class DatasetAdmin(admin.ModelAdmin):
+    list_display = ('id', 'created_at', 'source', 'is_active')
+    actions = ['make_active']
+
+    @admin.action(description='Сделать активным')
+    def make_active(self, request, queryset):
+        if queryset.count() != 1:
+            self.message_user(request, 'Выберите один набор данных', level='error')
+            return
+        activate_dataset(queryset.get())
+
 @admin.register(SalaryStatistics)
 class SalaryStatisticsAdmin(admin.ModelAdmin):
-    list_display = ('year', 'average_salary', 'vacancy_count', 'is_general')
-    list_filter = ('year', 'is_general')
+    list_display = ('year', 'average_salary', 'salary_p50', 'vacancy_count', 'is_general')
+    list_filter = ('dataset', 'year', 'is_general')
     search_fields = ('year',)
     ordering = ('-year',)
 
 @admin.register(GeographyData)
 class GeographyDataAdmin(admin.ModelAdmin):
-    list_display = ('city', 'average_salary', 'vacancy_share', 'year', 'is_general')
-    list_filter = ('year', 'is_general', 'city')
+    list_display = ('city', 'average_salary', 'salary_p50', 'vacancy_share', 'year', 'is_general')
+    list_filter = ('dataset', 'year', 'is_general', 'city')
     search_fields = ('city',)
     ordering = ('-average_salary',)
 
 @admin.register(Skill)
 class SkillAdmin(admin.ModelAdmin):
     list_display = ('name', 'count', 'year')
-    list_filter = ('year',)
+    list_filter = ('dataset', 'year',)
     search_fields = ('name',)
     ordering = ('-count',)
 
 @admin.register(Graph)
 class GraphAdmin(admin.ModelAdmin):
     list_display = ('title', 'graph_type', 'display_graph', 'is_general')
-    list_filter = ('graph_type', 'is_general')
+    list_filter = ('dataset', 'graph_type', 'is_general')
     search_fields = ('title',)
 
     def display_graph(self, obj):
@@ -45,9 +61,27 @@ class GraphAdmin(admin.ModelAdmin):
         return "Нет графика"
     display_graph.short_description = 'График'
 
+@admin.register(Profession)
+class ProfessionAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug', 'is_active')
+    list_filter = ('is_active',)
+    search_fields = ('name', 'slug', 'keywords')
+
+@admin.register(ProfessionStatistics)
+class ProfessionStatisticsAdmin(admin.ModelAdmin):
+    list_display = ('profession', 'year', 'average_salary', 'vacancy_count')
+    list_filter = ('dataset', 'profession', 'year')
+    ordering = ('profession', 'year')
+
+@admin.register(IngestedFile)
+class IngestedFileAdmin(admin.ModelAdmin):
+    list_display = ('source', 'vacancy_count', 'ingested_at', 'digest')
+    list_filter = ('dataset',)
+    search_fields = ('source', 'digest')
+
 @admin.register(LastVacancy)
 class LastVacancyAdmin(admin.ModelAdmin):
-    list_display = ('title', 'company', 'region', 'published_at')
+    list_display = ('title', 'company', 'region', 'published_at', 'fetched_at')
     list_filter = ('published_at', 'region')
     search_fields = ('title', 'company')
     ordering = ('-published_at',)
@@ -0,0 +1,246 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+class SQLiteCache(BaseCache):
+    """
+    Кэш в файле SQLite, общий для всех процессов сервера.
+    Размер ограничен числом записей (MAX_ENTRIES) и объёмом (MAX_BYTES),
+    при переполнении удаляются давно не читавшиеся записи (LRU).
+    Перед файлом - небольшой кэш в памяти процесса (L1) для горячих ключей
+    с коротким сроком жизни L1_TIMEOUT, чтобы изменения из других
+    процессов были видны не позже чем через L1_TIMEOUT секунд.
+    Время последнего чтения для LRU пишется в файл не чаще раза
+    в ACCESS_RESOLUTION секунд на ключ, чтобы чтение не становилось записью.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.path = location
+        self.max_bytes = options.get('MAX_BYTES')
+        self.l1_entries = options.get('L1_ENTRIES', 128)
+        self.l1_timeout = options.get('L1_TIMEOUT', 5)
+        self.access_resolution = options.get('ACCESS_RESOLUTION', 30)
+        self._local = threading.local()
+        self._l1 = OrderedDict()
+        self._l1_lock = threading.Lock()
+
+    @property
+    def _db(self):
+        # Соединение на поток: sqlite3 не разделяет соединения между потоками
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL, '
+                'accessed REAL NOT NULL, size INTEGER NOT NULL)'
+            )
+            db.execute('CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)')
+            # REPLACE удаляет прежнюю строку; без этого триггер удаления на неё не срабатывает
+            db.execute('PRAGMA recursive_triggers=ON')
+            self._create_stats(db)
+            self._local.db = db
+        return db
+
+    @staticmethod
+    def _create_stats(db):
+        """
+        Число записей и их объём в одной строке cache_stats, которую ведут
+        триггеры: проверка лимитов при записи не пересчитывает всю таблицу.
+        Таблица и триггеры создаются в одной транзакции с начальным подсчётом.
+        """
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            if db.execute("SELECT 1 FROM sqlite_master WHERE name = 'cache_stats'").fetchone() is None:
+                db.execute(
+                    'CREATE TABLE cache_stats (id INTEGER PRIMARY KEY CHECK (id = 1), '
+                    'count INTEGER NOT NULL, size INTEGER NOT NULL)'
+                )
+                db.execute('INSERT INTO cache_stats SELECT 1, COUNT(*), COALESCE(SUM(size), 0) FROM cache')
+                db.execute(
+                    'CREATE TRIGGER cache_stats_insert AFTER INSERT ON cache BEGIN '
+                    'UPDATE cache_stats SET count = count + 1, size = size + new.size; END'
+                )
+                db.execute(
+                    'CREATE TRIGGER cache_stats_delete AFTER DELETE ON cache BEGIN '
+                    'UPDATE cache_stats SET count = count - 1, size = size - old.size; END'
+                )
+                db.execute(
+                    'CREATE TRIGGER cache_stats_update AFTER UPDATE OF size ON cache BEGIN '
+                    'UPDATE cache_stats SET size = size - old.size + new.size; END'
+                )
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+
+    # L1 хранит сериализованные значения, как LocMemCache,
+    # чтобы вызывающий код не мог изменить закэшированный объект
+
+    def _l1_get(self, key):
+        """Значение и известное время чтения accessed из L1 или None"""
+        with self._l1_lock:
+            entry = self._l1.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._l1[key]
+                return None
+            self._l1.move_to_end(key)
+            return entry[0], entry[2]
+
+    def _l1_set(self, key, value, expires, accessed):
+        if not self.l1_entries:
+            return
+        l1_expires = time.time() + self.l1_timeout
+        if expires is not None:
+            l1_expires = min(l1_expires, expires)
+        with self._l1_lock:
+            self._l1[key] = (value, l1_expires, accessed)
+            self._l1.move_to_end(key)
+            while len(self._l1) > self.l1_entries:
+                self._l1.popitem(last=False)
+
+    def _l1_accessed(self, key, accessed):
+        with self._l1_lock:
+            entry = self._l1.get(key)
+            if entry is not None:
+                self._l1[key] = (entry[0], entry[1], accessed)
+
+    def _l1_delete(self, key):
+        with self._l1_lock:
+            self._l1.pop(key, None)
+
+    def _touch_accessed(self, key, accessed, now):
+        """
+        Запись времени чтения, если известное устарело больше чем на
+        access_resolution секунд; возвращает актуальное время чтения
+        """
+        if now - accessed < self.access_resolution:
+            return accessed
+        self._db.execute(
+            'UPDATE cache SET accessed = ? WHERE key = ? AND accessed < ?',
+            (now, key, now - self.access_resolution),
+        )
+        return now
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        entry = self._l1_get(key)
+        if entry is None:
+            row = self._db.execute(
+                'SELECT value, expires, accessed FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return default
+            value, expires, accessed = row
+            if expires is not None and expires <= now:
+                self._db.execute('DELETE FROM cache WHERE key = ? AND expires <= ?', (key, now))
+                return default
+            self._l1_set(key, value, expires, self._touch_accessed(key, accessed, now))
+        else:
+            # Попадание в L1 тоже продлевает запись в LRU файла
+            value, accessed = entry
+            touched = self._touch_accessed(key, accessed, now)
+            if touched != accessed:
+                self._l1_accessed(key, touched)
+        return pickle.loads(value)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        expires = self.get_backend_timeout(timeout)
+        now = time.time()
+        self._db.execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires, accessed, size) VALUES (?, ?, ?, ?, ?)',
+            (key, value, expires, now, len(value)),
+        )
+        self._l1_set(key, value, expires, now)
+        self._cull()
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        """Атомарно для всех процессов: запись добавляется, только если ключа нет"""
+        key = self.make_and_validate_key(key, version=version)
+        value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        expires = self.get_backend_timeout(timeout)
+        now = time.time()
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            db.execute('DELETE FROM cache WHERE key = ? AND expires <= ?', (key, now))
+            added = db.execute(
+                'INSERT OR IGNORE INTO cache (key, value, expires, accessed, size) VALUES (?, ?, ?, ?, ?)',
+                (key, value, expires, now, len(value)),
+            ).rowcount == 1
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        if added:
+            self._l1_set(key, value, expires, now)
+            self._cull()
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._l1_delete(key)
+        now = time.time()
+        return self._db.execute(
+            'UPDATE cache SET expires = ?, accessed = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), now, key, now),
+        ).rowcount == 1
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._l1_delete(key)
+        return self._db.execute('DELETE FROM cache WHERE key = ?', (key,)).rowcount == 1
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._db.execute(
+            'SELECT 1 FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time()),
+        ).fetchone() is not None
+
+    def clear(self):
+        with self._l1_lock:
+            self._l1.clear()
+        self._db.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Соединение остаётся открытым между запросами, как у LocMemCache
+        pass
+
+    def _cull(self):
+        """Удаление просроченных, затем давно не читавшихся записей сверх лимитов"""
+        db = self._db
+        count, size = db.execute('SELECT count, size FROM cache_stats').fetchone()
+        if count <= self._max_entries and (self.max_bytes is None or size <= self.max_bytes):
+            return
+        db.execute('DELETE FROM cache WHERE expires <= ?', (time.time(),))
+        rows = db.execute('SELECT key, size FROM cache ORDER BY accessed DESC').fetchall()
+        keep, total = 0, 0
+        for _, row_size in rows:
+            if keep >= self._max_entries or (self.max_bytes is not None and total + row_size > self.max_bytes):
+                break
+            keep += 1
+            total += row_size
+        stale = [key for key, _ in rows[keep:]]
+        db.executemany('DELETE FROM cache WHERE key = ?', [(key,) for key in stale])
+        with self._l1_lock:
+            for key in stale:
+                self._l1.pop(key, None)
@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+# Версия оформления: при её изменении все графики перерисовываются
+STYLE_VERSION = 1
+
+INDEX_NAME = 'index.json'
+
+# Имя файла графика: <логическое имя>.<хэш данных и оформления>.png
+HASHED_NAME = re.compile(r'^(?P<name>[\w-]+)\.(?P<digest>[0-9a-f]{12})\.png$')
+
+
+def chart_digest(data, title, chart_type):
+    """Хэш входного ряда и параметров графика"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f'{STYLE_VERSION}|{chart_type}|{title}'.encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def render_chart(data, title, path, chart_type='line'):
+    """
+    Отрисовка одного графика в PNG через объектный API Figure,
+    без глобального состояния pyplot - безопасно для пула процессов.
+    """
+    fig = Figure(figsize=(12, 6))
+    ax = fig.subplots()
+    ax.grid(True, linestyle='--', alpha=0.7)
+    set3 = matplotlib.colormaps['Set3']
+
+    if chart_type == 'line' and isinstance(data, pd.DataFrame):
+        # Несколько рядов (например, квантили) - по линии на столбец с легендой
+        colors = matplotlib.colormaps['viridis'](np.linspace(0, 0.9, len(data.columns)))
+        for column, color in zip(data.columns, colors):
+            ax.plot(data.index, data[column], marker='o', linewidth=2, color=color, label=column)
+        ax.legend()
+        ax.tick_params(axis='x', labelrotation=45)
+    elif chart_type == 'line':
+        ax.plot(data.index, data.values, marker='o', linewidth=2, color='#2c3e50')
+        ax.grid(True)
+        ax.tick_params(axis='x', labelrotation=45)
+    elif chart_type == 'bar':
+        colors = set3(np.linspace(0, 1, len(data.head(20))))
+        data.head(20).plot(kind='bar', color=colors, ax=ax)
+        for label in ax.get_xticklabels():
+            label.set_rotation(45)
+            label.set_horizontalalignment('right')
+    elif chart_type == 'pie':
+        colors = set3(np.linspace(0, 1, len(data.head(10))))
+        ax.pie(
+            data.head(10),
+            labels=data.head(10).index,
+            autopct='%1.1f%%',
+            startangle=90,
+            colors=colors
+        )
+
+    ax.set_title(title, pad=20, fontsize=12, fontweight='bold')
+    fig.tight_layout()
+
+    # Запись через временный файл: под итоговым именем не бывает недописанного PNG
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fig.savefig(f'{path}.tmp', format='png', dpi=300, bbox_inches='tight')
+    os.replace(f'{path}.tmp', path)
+    return path
+
+
+def hashed_filename(filename, digest):
+    """Неизменяемое имя файла графика с хэшем содержимого"""
+    name, ext = os.path.splitext(filename)
+    return f'{name}.{digest[:12]}{ext}'
+
+
+def read_index(directory):
+    """Индекс: логическое имя графика -> текущий файл"""
+    try:
+        with open(os.path.join(directory, INDEX_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_index(directory, index):
+    path = os.path.join(directory, INDEX_NAME)
+    with open(f'{path}.tmp', 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    os.replace(f'{path}.tmp', path)
+
+
+def render_charts(charts, directory, workers=None):
+    """
+    Отрисовка набора графиков в пуле процессов.
+    charts - список словарей с ключами data, title, filename, chart_type,
+    где filename - логическое имя графика. Файл получает имя с хэшем
+    данных и оформления, поэтому уже существующий файл не перерисовывается.
+    Возвращает имена файлов в порядке charts.
+    """
+    os.makedirs(directory, exist_ok=True)
+    index = read_index(directory)
+    files, pending = [], []
+    for chart in charts:
+        digest = chart_digest(chart['data'], chart['title'], chart['chart_type'])
+        filename = hashed_filename(chart['filename'], digest)
+        files.append(filename)
+        index[chart['filename']] = filename
+        if not os.path.exists(os.path.join(directory, filename)):
+            pending.append((chart, os.path.join(directory, filename)))
+
+    if workers == 1 or len(pending) <= 1:
+        for chart, path in pending:
+            render_chart(chart['data'], chart['title'], path, chart['chart_type'])
+    elif pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(render_chart, chart['data'], chart['title'], path, chart['chart_type'])
+                for chart, path in pending
+            ]
+            for future in futures:
+                future.result()
+
+    _write_index(directory, index)
+    return files
+
+
+def evict_charts(directory, keep=()):
+    """
+    Удаление файлов графиков, на которые не ссылается индекс
+    и которых нет в keep (например, графики сохранённых наборов данных).
+    Возвращает имена удалённых файлов.
+    """
+    if not os.path.isdir(directory):
+        return []
+    referenced = set(read_index(directory).values()) | {os.path.basename(name) for name in keep}
+    removed = []
+    for filename in os.listdir(directory):
+        if HASHED_NAME.match(filename) and filename not in referenced:
+            os.remove(os.path.join(directory, filename))
+            removed.append(filename)
+    return removed
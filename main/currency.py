@@ -0,0 +1,113 @@
+import os
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+
+# Статичные курсы валют к рублю
+CURRENCY_RATES = {
+    'USD': 90, 'EUR': 98, 'RUR': 1, 'RUB': 1,
+    'KZT': 0.15, 'BYR': 27, 'UAH': 2.5, 'GEL': 34
+}
+
+RUBLE_CODES = ('RUR', 'RUB')
+
+# Разобранные файлы курсов: (путь, mtime, размер) -> HistoricalCurrencyRates
+_rates_cache = {}
+
+
+class StaticCurrencyRates:
+    """Один курс на валюту независимо от даты публикации"""
+
+    def __init__(self, rates=None):
+        self.rates = dict(CURRENCY_RATES if rates is None else rates)
+
+    def lookup(self, currencies, dates):
+        """Курсы для каждой вакансии; NaN для неизвестной валюты"""
+        return pd.Series(currencies).map(self.rates).to_numpy(dtype='float64', na_value=np.nan)
+
+
+class HistoricalCurrencyRates:
+    """Помесячные курсы валют в массиве (валюта, месяц)"""
+
+    def __init__(self, currencies, first_month, table):
+        self.currencies = pd.Index(currencies)
+        # Номер месяца в виде year * 12 + (month - 1)
+        self.first_month = first_month
+        self.table = table
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Построение таблицы из столбцов date, currency, rate"""
+        dates = pd.to_datetime(frame['date'], errors='coerce')
+        frame = pd.DataFrame({
+            'month': dates.dt.year * 12 + dates.dt.month - 1,
+            'currency': frame['currency'].str.upper(),
+            'rate': pd.to_numeric(frame['rate'], errors='coerce'),
+        }).dropna()
+        if frame.empty:
+            raise ValueError('Currency rate file contains no rates')
+
+        # Несколько курсов за месяц усредняются
+        monthly = frame.groupby(['currency', 'month'])['rate'].mean().unstack('month')
+        first_month, last_month = int(monthly.columns.min()), int(monthly.columns.max())
+        monthly = monthly.reindex(columns=range(first_month, last_month + 1))
+        # Пропущенные месяцы заполняются ближайшим известным курсом
+        monthly = monthly.ffill(axis=1).bfill(axis=1)
+        for code in RUBLE_CODES:
+            monthly.loc[code] = 1.0
+
+        return cls(monthly.index, first_month, monthly.to_numpy(dtype='float32'))
+
+    @classmethod
+    def from_csv(cls, path):
+        """
+        Чтение CSV вида date,USD,EUR,... с датой YYYY-MM или YYYY-MM-DD
+        и курсом в рублях за единицу валюты.
+        """
+        wide = pd.read_csv(path, dtype={'date': str})
+        frame = wide.melt(id_vars='date', var_name='currency', value_name='rate')
+        return cls.from_frame(frame)
+
+    @classmethod
+    def from_xml(cls, path):
+        """Чтение выгрузки ЦБ РФ (XML_daily) с одним или несколькими элементами ValCurs"""
+        records = []
+        for val_curs in ET.parse(path).getroot().iter('ValCurs'):
+            date = pd.to_datetime(val_curs.get('Date'), format='%d.%m.%Y')
+            for valute in val_curs.iter('Valute'):
+                nominal = float(valute.findtext('Nominal', '1').replace(',', '.'))
+                value = float(valute.findtext('Value').replace(',', '.'))
+                records.append((date, valute.findtext('CharCode'), value / nominal))
+        return cls.from_frame(pd.DataFrame(records, columns=['date', 'currency', 'rate']))
+
+    def lookup(self, currencies, dates):
+        """Курсы на месяц публикации; NaN для неизвестной валюты или даты"""
+        currency_idx = self.currencies.get_indexer(pd.Series(currencies).astype(object))
+        dates = pd.Series(dates)
+        months = (dates.dt.year * 12 + dates.dt.month - 1).to_numpy(dtype='float64', na_value=np.nan)
+
+        invalid = (currency_idx < 0) | np.isnan(months)
+        # Даты вне диапазона таблицы получают крайний известный курс
+        month_idx = np.clip(
+            np.nan_to_num(months - self.first_month), 0, self.table.shape[1] - 1
+        ).astype(np.intp)
+        rates = self.table[np.maximum(currency_idx, 0), month_idx].astype('float64')
+        rates[invalid] = np.nan
+        return rates
+
+
+def load_currency_rates(path):
+    """Загрузка помесячных курсов из CSV или XML с кэшированием в процессе"""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    if key not in _rates_cache:
+        # Устаревшие версии того же файла больше не понадобятся
+        for stale in [k for k in _rates_cache if k[0] == path]:
+            del _rates_cache[stale]
+        if path.lower().endswith('.xml'):
+            _rates_cache[key] = HistoricalCurrencyRates.from_xml(path)
+        else:
+            _rates_cache[key] = HistoricalCurrencyRates.from_csv(path)
+    return _rates_cache[key]
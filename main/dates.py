@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+# published_at у hh.ru: 2022-07-05T18:19:30+0300 - всегда 24 символа
+TIMESTAMP_LENGTH = 24
+# Разделители на своих позициях; на позиции SIGN - знак смещения
+SEPARATORS = {4: '-', 7: '-', 10: 'T', 13: ':', 16: ':'}
+SIGN = 19
+
+
+def _string_buffers(values):
+    """Смещения, байты и маска пропусков строк в формате Arrow (без копирования для str)"""
+    import pyarrow as pa
+
+    array = pa.array(values, from_pandas=True)
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+    if not pa.types.is_large_string(array.type):
+        array = array.cast(pa.large_string())
+    _, offsets, data = array.buffers()
+    offsets = np.frombuffer(offsets, dtype=np.int64)[array.offset:array.offset + len(array) + 1]
+    data = np.frombuffer(data, dtype=np.uint8) if data is not None else np.zeros(0, dtype=np.uint8)
+    return offsets, data, array.is_null().to_numpy(zero_copy_only=False)
+
+
+class _Fields:
+    """
+    Числовые поля строк фиксированного формата. Символы строк собираются
+    одним копированием через окно по байтам в матрицу (позиция, строка):
+    символы одной позиции лежат подряд, и операции над полями векторные.
+    """
+
+    def __init__(self, data, starts):
+        if len(data) < TIMESTAMP_LENGTH:
+            data = np.zeros(TIMESTAMP_LENGTH, dtype=np.uint8)
+        windows = np.lib.stride_tricks.sliding_window_view(data, TIMESTAMP_LENGTH)
+        self.chars = np.ascontiguousarray(windows[starts].T)
+        self.valid = np.ones(len(starts), dtype=bool)
+
+    def char(self, position, expected):
+        self.valid &= self.chars[position] == ord(expected)
+
+    def number(self, position, width):
+        # Не цифры после вычитания переполняют uint8 и дают значения больше 9
+        digits = self.chars[position:position + width] - np.uint8(ord('0'))
+        self.valid &= (digits <= 9).all(axis=0)
+        result = digits[0].astype(np.int32)
+        for i in range(1, width):
+            result = result * 10 + digits[i]
+        return result
+
+
+def _parse_canonical(offsets, data, nulls):
+    """
+    Разбор строк ровно формата hh.ru. Возвращает номера разобранных строк,
+    секунды UTC и местный год для них.
+    """
+    canonical = np.flatnonzero((np.diff(offsets) == TIMESTAMP_LENGTH) & ~nulls)
+
+    fields = _Fields(data, offsets[canonical])
+    for position, expected in SEPARATORS.items():
+        fields.char(position, expected)
+    sign = fields.chars[SIGN]
+    fields.valid &= (sign == ord('+')) | (sign == ord('-'))
+    sign = np.where(sign == ord('-'), -1, 1)
+    year = fields.number(0, 4)
+    date_key = year * 10000 + fields.number(5, 2) * 100 + fields.number(8, 2)
+    hour, minute, second = fields.number(11, 2), fields.number(14, 2), fields.number(17, 2)
+    offset = sign * (fields.number(20, 2) * 3600 + fields.number(22, 2) * 60)
+    fields.valid &= (hour < 24) & (minute < 60) & (second < 60)
+
+    # Кэш дат: календарь проверяется только для уникальных дат
+    codes, unique_keys = pd.factorize(date_key)
+    unique_days = pd.to_datetime(
+        pd.Series(unique_keys, dtype='int64').astype(str), format='%Y%m%d', errors='coerce'
+    )
+    day_numbers = unique_days.to_numpy(dtype='datetime64[D]').astype(np.int64)
+    bad_days = unique_days.isna().to_numpy()
+    fields.valid &= ~bad_days[codes]
+
+    valid = fields.valid
+    seconds = (
+        day_numbers[codes[valid]] * 86400 + hour[valid] * 3600 + minute[valid] * 60 + second[valid]
+        - offset[valid]
+    )
+    return canonical[valid], seconds, year[valid]
+
+
+def parse_published_at(values):
+    """
+    Разбор published_at формата hh.ru (YYYY-MM-DDTHH:MM:SS±HHMM) прямо из
+    байтов строк, без промежуточных строковых столбцов. Время переводится
+    в UTC с учётом смещения (в том числе отрицательного), год - календарный
+    год публикации по местному времени, как раньше. Дата переводится в день
+    календаря один раз на каждую уникальную дату: даты сильно повторяются.
+    Строки другого вида (и все строки без pyarrow) разбираются общим
+    pd.to_datetime, нераспознанные дают NaT.
+    Возвращает (время публикации в UTC, год Int16).
+    """
+    values = pd.Series(values)
+    seconds = np.full(len(values), np.iinfo(np.int64).min, dtype=np.int64)
+    years = pd.Series(pd.NA, index=values.index, dtype='Int16')
+    other = values.notna().to_numpy(copy=True)
+
+    try:
+        offsets, data, nulls = _string_buffers(values)
+    except ImportError:
+        # Без pyarrow нет доступа к байтам строк: всё идёт общим разбором
+        pass
+    else:
+        rows, parsed_seconds, parsed_years = _parse_canonical(offsets, data, nulls)
+        seconds[rows] = parsed_seconds
+        years.iloc[rows] = parsed_years
+        other[rows] = False
+
+    published_at = pd.Series(seconds.view('datetime64[s]'), index=values.index).dt.tz_localize('UTC')
+
+    # Прочие записи даты (например, +03:00 или Z) - общим разбором ISO 8601
+    if other.any():
+        rest = values[other]
+        parsed = pd.to_datetime(rest, format='ISO8601', utc=True, errors='coerce')
+        published_at[other] = parsed.astype(published_at.dtype)
+        # Год - из записи даты (местное время), а не из времени UTC
+        local_years = pd.to_numeric(rest.astype(str).str[:4], errors='coerce')
+        years[other] = local_years.where(parsed.notna()).astype('Int16')
+    return published_at, years
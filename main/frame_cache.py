@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+# Версия формата кэша: меняется при изменении разбора CSV
+CACHE_VERSION = 3
+
+
+def cache_paths(csv_path):
+    """Пути к файлу данных кэша и к его описанию рядом с исходным CSV"""
+    return f'{csv_path}.parsed.parquet', f'{csv_path}.parsed.json'
+
+
+def file_digest(path, block_size=1 << 20):
+    """Хэш содержимого файла, читаемого блоками"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(meta_path, meta):
+    tmp_path = f'{meta_path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+
+
+def load_cached_frame(csv_path, digest=None):
+    """
+    Загрузка разобранного DataFrame из кэша, если исходный файл не менялся.
+    Размер и mtime проверяются сразу, хэш содержимого - только если mtime
+    изменился (например, файл скопировали заново); digest - уже посчитанный хэш.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return None
+
+    data_path, meta_path = cache_paths(csv_path)
+    meta = _read_meta(meta_path)
+    if not meta or meta.get('version') != CACHE_VERSION or not os.path.exists(data_path):
+        return None
+
+    stat = os.stat(csv_path)
+    if meta['size'] != stat.st_size:
+        return None
+    if meta['mtime_ns'] != stat.st_mtime_ns:
+        if (digest or file_digest(csv_path)) != meta['digest']:
+            return None
+        meta['mtime_ns'] = stat.st_mtime_ns
+        try:
+            _write_meta(meta_path, meta)
+        except OSError:
+            # Каталог только для чтения: в следующий раз хэш посчитается снова
+            pass
+
+    return pd.read_parquet(data_path)
+
+
+def save_cached_frame(csv_path, df, digest=None):
+    """
+    Сохранение разобранного DataFrame в Parquet рядом с исходным CSV;
+    digest - уже посчитанный хэш файла. Если каталог недоступен для записи,
+    кэш не сохраняется и возвращается False.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+
+    data_path, meta_path = cache_paths(csv_path)
+    stat = os.stat(csv_path)
+    tmp_path = f'{data_path}.tmp'
+    try:
+        df.to_parquet(tmp_path, engine='pyarrow', index=False)
+        os.replace(tmp_path, data_path)
+        _write_meta(meta_path, {
+            'version': CACHE_VERSION,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'digest': digest or file_digest(csv_path),
+        })
+    except OSError:
+        for path in (tmp_path, f'{meta_path}.tmp'):
+            if os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        return False
+    return True
@@ -0,0 +1,192 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+# Параметры поиска последних PHP вакансий
+LATEST_PHP_PARAMS = {
+    'text': 'PHP OR ПХП OR РНР',
+    'period': 1,
+    'per_page': 10,
+    'order_by': 'publication_time',
+}
+
+
+class HHClient:
+    """
+    Клиент API hh.ru: общая сессия с keep-alive и пул потоков
+    для одновременных запросов деталей вакансий.
+    """
+
+    def __init__(self, base_url=None, timeout=None, max_concurrency=None):
+        self.base_url = (base_url or getattr(settings, 'HH_API_URL', 'https://api.hh.ru')).rstrip('/')
+        # Таймаут на каждый запрос: (подключение, чтение)
+        self.timeout = timeout or getattr(settings, 'HH_API_TIMEOUT', (3.05, 10))
+        self.max_concurrency = max_concurrency or getattr(settings, 'HH_API_CONCURRENCY', 10)
+
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = getattr(settings, 'HH_USER_AGENT', 'ulearnsite/1.0')
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # Размер пула ограничивает число одновременных запросов к API
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix='hh-api'
+        )
+
+    def _get(self, path, params=None):
+        response = self.session.get(f'{self.base_url}{path}', params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def search(self, params):
+        """Поиск вакансий, возвращает список items"""
+        return self._get('/vacancies', params)['items']
+
+    def vacancy_detail(self, vacancy_id):
+        """Детали вакансии или None, если запрос не удался"""
+        try:
+            return self._get(f'/vacancies/{vacancy_id}')
+        except (requests.RequestException, ValueError):
+            return None
+
+    def vacancy_details(self, vacancy_ids):
+        """Детали нескольких вакансий одновременно, в порядке vacancy_ids"""
+        return list(self.executor.map(self.vacancy_detail, vacancy_ids))
+
+    def latest_vacancies(self, params=None):
+        """Последние вакансии в формате шаблона latest_vacancies"""
+        items = self.search(params or LATEST_PHP_PARAMS)
+        details = self.vacancy_details([item['id'] for item in items])
+        return [build_vacancy(item, detail) for item, detail in zip(items, details)]
+
+
+class AsyncHHClient:
+    """
+    Асинхронный клиент API hh.ru для ASGI: пул соединений httpx и семафор,
+    ограничивающий число одновременных запросов деталей.
+    """
+
+    def __init__(self, base_url=None, timeout=None, max_concurrency=None):
+        self.base_url = (base_url or getattr(settings, 'HH_API_URL', 'https://api.hh.ru')).rstrip('/')
+        timeout = timeout or getattr(settings, 'HH_API_TIMEOUT', (3.05, 10))
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency or getattr(settings, 'HH_API_CONCURRENCY', 10)
+        self._loop = None
+        self._client = None
+        self._semaphore = None
+
+    @property
+    def client(self):
+        # httpx.AsyncClient и семафор привязаны к циклу событий: под ASGI цикл у процесса один,
+        # новые создаются только при смене цикла (например, в тестах)
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                headers={'User-Agent': getattr(settings, 'HH_USER_AGENT', 'ulearnsite/1.0')},
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+            )
+        return self._client
+
+    @property
+    def semaphore(self):
+        """Общий для всех запросов клиента предел одновременных запросов деталей"""
+        self.client
+        return self._semaphore
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _get(self, path, params=None):
+        response = await self.client.get(f'{self.base_url}{path}', params=params)
+        response.raise_for_status()
+        return response.json()
+
+    async def search(self, params):
+        """Поиск вакансий, возвращает список items"""
+        return (await self._get('/vacancies', params))['items']
+
+    async def vacancy_detail(self, vacancy_id):
+        """Детали вакансии или None, если запрос не удался"""
+        async with self.semaphore:
+            try:
+                return await self._get(f'/vacancies/{vacancy_id}')
+            except (httpx.HTTPError, ValueError):
+                return None
+
+    async def vacancy_details(self, vacancy_ids):
+        """Детали нескольких вакансий одновременно, в порядке vacancy_ids"""
+        return await asyncio.gather(*(self.vacancy_detail(vacancy_id) for vacancy_id in vacancy_ids))
+
+    async def latest_vacancies(self, params=None):
+        """Последние вакансии в формате шаблона latest_vacancies"""
+        items = await self.search(params or LATEST_PHP_PARAMS)
+        details = await self.vacancy_details([item['id'] for item in items])
+        return [build_vacancy(item, detail) for item, detail in zip(items, details)]
+
+
+def build_vacancy(item, detail=None):
+    """Словарь вакансии из элемента поиска и (необязательно) её деталей"""
+    vacancy = {
+        'title': item['name'],
+        'company': item['employer']['name'],
+        'region': item['area']['name'],
+        'published_at': datetime.strptime(
+            item['published_at'],
+            '%Y-%m-%dT%H:%M:%S%z'
+        ),
+        'skills': '',
+        'salary_from': None,
+        'salary_to': None,
+        'salary_currency': None,
+    }
+
+    if item['salary']:
+        vacancy['salary_from'] = item['salary']['from']
+        vacancy['salary_to'] = item['salary']['to']
+        vacancy['salary_currency'] = item['salary']['currency']
+
+    if detail is not None:
+        if detail.get('key_skills'):
+            skills = [skill['name'] for skill in detail['key_skills']]
+            vacancy['skills'] = ', '.join(skills)
+
+        vacancy['description'] = detail.get('description', '')
+
+    return vacancy
+
+
+_client = None
+
+
+def get_client():
+    """Общий для процесса клиент API hh.ru"""
+    global _client
+    if _client is None:
+        _client = HHClient()
+    return _client
+
+
+_async_client = None
+
+
+def get_async_client():
+    """Общий для процесса асинхронный клиент API hh.ru"""
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncHHClient()
+    return _async_client
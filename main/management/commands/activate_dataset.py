@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from main.models import Dataset
+from main.storage import activate_dataset
+
+
+class Command(BaseCommand):
+    help = "List dataset snapshots or activate one of them (rollback)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "dataset_id", type=int, nargs="?", help="Snapshot to make active"
+        )
+
+    def handle(self, *args, **options):
+        if options["dataset_id"] is None:
+            for dataset in Dataset.objects.all():
+                marker = "*" if dataset.is_active else " "
+                self.stdout.write(
+                    f"{marker} #{dataset.pk}  {dataset.created_at:%Y-%m-%d %H:%M}  {dataset.source}"
+                )
+            return
+
+        try:
+            dataset = Dataset.objects.get(pk=options["dataset_id"])
+        except Dataset.DoesNotExist:
+            raise CommandError(f"Dataset #{options['dataset_id']} does not exist")
+
+        activate_dataset(dataset)
+        self.stdout.write(self.style.SUCCESS(f"Activated dataset #{dataset.pk}"))
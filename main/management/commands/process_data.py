@@ -1,14 +1,99 @@
 from django.core.management.base import BaseCommand
-from main.utils import DataProcessor
-from main.models import SalaryStatistics, GeographyData, Skill, Graph
+from django.conf import settings
+from main.charts import evict_charts
+from main.currency import load_currency_rates
+from main.frame_cache import file_digest
+from main.sketch import QUANTILES
+from main.professions import registry_digest
+from main.storage import publish_dataset
+from main.utils import DataProcessor, dump_aggregates, load_aggregates
+from main.models import (
+    Dataset,
+    DatasetState,
+    SalaryStatistics,
+    GeographyData,
+    Skill,
+    Graph,
+    IngestedFile,
+    Profession,
+    ProfessionStatistics,
+)
 import os
 
+import pandas as pd
+
+
+def distribution_fields(table, key):
+    """Поля SalaryDistribution для группы key из StatisticsAccumulator.distributions"""
+    row = table.loc[key]
+    fields = {
+        "salary_sum": float(row["salary_sum"]),
+        "salary_count": int(row["salary_count"]),
+        "salary_sumsq": float(row["salary_sumsq"]),
+        "salary_sketch": row["salary_sketch"],
+    }
+    for name in QUANTILES:
+        value = row[f"salary_{name}"]
+        fields[f"salary_{name}"] = None if pd.isna(value) else float(value)
+    return fields
+
 
 class Command(BaseCommand):
     help = "Process vacancy data from CSV file"
 
     def add_arguments(self, parser):
         parser.add_argument("csv_file", type=str, help="Path to the CSV file")
+        parser.add_argument(
+            "--chunksize",
+            type=int,
+            default=None,
+            help="Read the CSV in chunks of N rows to keep memory bounded",
+        )
+        parser.add_argument(
+            "--currency-rates",
+            type=str,
+            default=None,
+            help="CSV or CBR XML file with monthly currency rates",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Aggregate CSV chunks in a pool of N processes",
+        )
+        parser.add_argument(
+            "--render-workers",
+            type=int,
+            default=None,
+            help="Processes for graph rendering (default: number of CPUs)",
+        )
+        parser.add_argument(
+            "--no-graphs",
+            action="store_true",
+            help="Skip PNG rendering; pages draw charts from the JSON API",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Rows per INSERT when saving results",
+        )
+        parser.add_argument(
+            "--keep",
+            type=int,
+            default=3,
+            help="Number of dataset snapshots to keep for rollback",
+        )
+        parser.add_argument(
+            "--no-cache",
+            action="store_true",
+            help="Do not read or write the parsed Parquet cache next to the CSV",
+        )
+        parser.add_argument(
+            "--append",
+            action="store_true",
+            help="Add the file to the active dataset instead of a full rebuild",
+        )
 
     def handle(self, *args, **options):
         csv_path = options["csv_file"]
@@ -21,102 +106,267 @@ class Command(BaseCommand):
                 self.style.SUCCESS(f"Starting data processing from {csv_path}")
             )
 
-            # Очищаем старые данные
-            SalaryStatistics.objects.all().delete()
-            GeographyData.objects.all().delete()
-            Skill.objects.all().delete()
-            Graph.objects.all().delete()
+            # Хэш содержимого - ключ файла: повторно загруженный файл не учитывается дважды
+            digest = file_digest(csv_path)
+
+            # Реестр профессий: все размечаются за один проход по названиям
+            professions = {
+                profession.slug: profession
+                for profession in Profession.objects.filter(is_active=True)
+            }
+            keywords = [
+                (slug, profession.keyword_list) for slug, profession in professions.items()
+            ]
+            registry = registry_digest(keywords)
+
+            ingested, state = [], None
+            if options["append"]:
+                active = Dataset.objects.filter(is_active=True).first()
+                state = DatasetState.objects.filter(dataset=active).first()
+                if state is None:
+                    self.stdout.write(
+                        self.style.ERROR(
+                            "No active dataset with stored aggregates, run a full import first"
+                        )
+                    )
+                    return
+                if state.registry != registry:
+                    self.stdout.write(
+                        self.style.ERROR(
+                            "Profession registry changed since the active dataset was built, "
+                            "run a full import"
+                        )
+                    )
+                    return
+                ingested = list(IngestedFile.objects.filter(dataset=active))
+                if any(file.digest == digest for file in ingested):
+                    self.stdout.write(
+                        self.style.WARNING(f"File is already ingested, skipped: {csv_path}")
+                    )
+                    return
 
             # Создаем экземпляр обработчика данных
-            processor = DataProcessor(csv_path)
+            currency_rates = None
+            if options["currency_rates"]:
+                currency_rates = load_currency_rates(options["currency_rates"])
+
+            processor = DataProcessor(
+                csv_path,
+                chunksize=options["chunksize"],
+                currency_rates=currency_rates,
+                use_cache=not options["no_cache"],
+                digest=digest,
+                workers=options["workers"],
+                professions=keywords,
+            )
+
+            if processor.df is not None:
+                self.stdout.write(
+                    f"Loaded {len(processor.df)} vacancies, "
+                    f"{processor.memory_usage() / 2**20:.1f} MiB in memory"
+                )
+
+            # Вакансии в валютах без курса не попадают в статистику - об этом предупреждаем
+            if processor.missing_rates:
+                missing = ", ".join(
+                    f"{currency}: {count}"
+                    for currency, count in sorted(processor.missing_rates.items())
+                )
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"Skipped {sum(processor.missing_rates.values())} vacancies "
+                        f"with no currency rate ({missing})"
+                    )
+                )
+
+            # Дозагрузка: новые вакансии складываются с агрегатами активного набора
+            vacancy_count = processor.aggregates()[0].total
+            if state is not None:
+                processor.extend(*load_aggregates(state.aggregates))
+                self.stdout.write(f"Appending {vacancy_count} vacancies to the active dataset")
 
-            # Обработка и сохранение всех данных
+            # Обработка данных
             self.stdout.write("Processing data...")
+            records = self.build_records(
+                processor,
+                render_workers=options["render_workers"],
+                graphs=not options["no_graphs"],
+                professions=professions,
+            )
+            records[DatasetState] = [
+                DatasetState(
+                    aggregates=dump_aggregates(*processor.aggregates()),
+                    registry=registry,
+                )
+            ]
+            records[IngestedFile] = [
+                IngestedFile(
+                    digest=file.digest,
+                    source=file.source,
+                    vacancy_count=file.vacancy_count,
+                    ingested_at=file.ingested_at,
+                )
+                for file in ingested
+            ] + [
+                IngestedFile(
+                    digest=digest,
+                    source=os.path.abspath(csv_path),
+                    vacancy_count=vacancy_count,
+                )
+            ]
 
-            # Статистика зарплат
-            all_salary, all_count, php_salary, php_count = (
-                processor.process_salary_statistics()
+            # Запись нового набора данных и его активация
+            self.stdout.write("Saving data...")
+            dataset, rows, elapsed = publish_dataset(
+                records,
+                source=os.path.abspath(csv_path),
+                batch_size=options["batch_size"],
+                keep=options["keep"],
+            )
+            self.stdout.write(
+                f"Saved {rows} rows in {elapsed:.2f}s "
+                f"({rows / max(elapsed, 1e-9):.0f} rows/s)"
+            )
+            self.stdout.write(f"Activated dataset #{dataset.pk}")
+
+            # Удаление файлов графиков, на которые больше не ссылается ни один набор
+            removed = evict_charts(
+                os.path.join(settings.MEDIA_ROOT, "graphs"),
+                keep=Graph.objects.values_list("image", flat=True),
+            )
+            if removed:
+                self.stdout.write(f"Removed {len(removed)} unused graph files")
+
+            self.stdout.write(self.style.SUCCESS("Successfully processed vacancy data"))
+
+            # Итоговая статистика
+            self.stdout.write(
+                f"Total statistics records: {SalaryStatistics.objects.active().count()}"
+            )
+            self.stdout.write(
+                f"Total geography records: {GeographyData.objects.active().count()}"
             )
+            self.stdout.write(f"Total skills records: {Skill.objects.active().count()}")
+            self.stdout.write(f"Total graphs: {Graph.objects.active().count()}")
+
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f"Error processing: {str(e)}"))
+            raise
+
+    def build_records(self, processor, render_workers=None, graphs=True, professions=None):
+        """Подготовка несохранённых объектов всех моделей статистики"""
+        records = {
+            SalaryStatistics: [],
+            GeographyData: [],
+            Skill: [],
+            Graph: [],
+            ProfessionStatistics: [],
+        }
 
-            # Сохранение статистики
-            for year in all_salary.index:
-                SalaryStatistics.objects.create(
+        # Суммы и скетчи зарплат для точного слияния, по уровням группировки
+        all_aggregates, php_aggregates = processor.aggregates()
+        distributions = {
+            level: (all_aggregates.distributions(level), php_aggregates.distributions(level))
+            for level in ("year", "city", "year_city")
+        }
+
+        # Статистика зарплат
+        all_salary, all_count, php_salary, php_count = (
+            processor.process_salary_statistics()
+        )
+        all_years, php_years = distributions["year"]
+        for year in all_salary.index:
+            records[SalaryStatistics].append(
+                SalaryStatistics(
                     year=year,
                     average_salary=all_salary[year],
                     vacancy_count=all_count[year],
                     is_general=True,
+                    **distribution_fields(all_years, year),
                 )
-                if year in php_salary.index:
-                    SalaryStatistics.objects.create(
+            )
+            if year in php_salary.index:
+                records[SalaryStatistics].append(
+                    SalaryStatistics(
                         year=year,
                         average_salary=php_salary[year],
                         vacancy_count=php_count[year],
                         is_general=False,
+                        **distribution_fields(php_years, year),
                     )
-
-            # География
-            all_geo, php_geo = processor.process_geography_data()
-
-            # Сохранение географии
-            for city in all_geo.index:
-                GeographyData.objects.create(
-                    city=city,
-                    average_salary=all_geo.loc[city, "salary_rub"],
-                    vacancy_share=all_geo.loc[city, "vacancy_share"],
-                    year=2024,
-                    is_general=True,
                 )
 
-            for city in php_geo.index:
-                GeographyData.objects.create(
-                    city=city,
-                    average_salary=php_geo.loc[city, "salary_rub"],
-                    vacancy_share=php_geo.loc[city, "vacancy_share"],
-                    year=2024,
-                    is_general=False,
+        # География: сводка за все годы (year=None) и срез по каждому году
+        all_geo, php_geo = processor.process_geography_data()
+        all_geo_by_year, php_geo_by_year = processor.process_geography_by_year()
+        for geo, cities, is_general in (
+            (all_geo, distributions["city"][0], True),
+            (php_geo, distributions["city"][1], False),
+        ):
+            for city in geo.index:
+                records[GeographyData].append(
+                    GeographyData(
+                        city=city,
+                        average_salary=geo.loc[city, "salary_rub"],
+                        vacancy_share=geo.loc[city, "vacancy_share"],
+                        year=None,
+                        is_general=is_general,
+                        **distribution_fields(cities, city),
+                    )
+                )
+        for geo, cities, is_general in (
+            (all_geo_by_year, distributions["year_city"][0], True),
+            (php_geo_by_year, distributions["year_city"][1], False),
+        ):
+            for (year, city), row in geo.iterrows():
+                records[GeographyData].append(
+                    GeographyData(
+                        city=city,
+                        average_salary=row["salary_rub"],
+                        vacancy_share=row["vacancy_share"],
+                        year=year,
+                        is_general=is_general,
+                        **distribution_fields(cities, (year, city)),
+                    )
                 )
 
-            # Навыки
-            all_skills, php_skills = processor.process_skills()
-
-            # Сохранение навыков
-            for skill, count in all_skills.head(20).items():
-                Skill.objects.create(
-                    name=skill, year=2024, count=count, is_general=True
+        # Профессии реестра по годам
+        professions = professions or {}
+        profession_stats = processor.process_profession_statistics()
+        profession_years = all_aggregates.distributions("profession_year")
+        for (slug, year), row in profession_stats.iterrows():
+            if slug in professions:
+                records[ProfessionStatistics].append(
+                    ProfessionStatistics(
+                        profession=professions[slug],
+                        year=year,
+                        average_salary=row["salary_rub"],
+                        vacancy_count=row["name"],
+                        **distribution_fields(profession_years, (slug, year)),
+                    )
                 )
 
-            for skill, count in php_skills.head(20).items():
-                Skill.objects.create(
-                    name=skill, year=2024, count=count, is_general=False
+        # Навыки
+        all_skills, php_skills = processor.process_top_skills()
+        for skills, is_general in ((all_skills, True), (php_skills, False)):
+            for skill, count in skills.items():
+                records[Skill].append(
+                    Skill(name=skill, year=2024, count=count, is_general=is_general)
                 )
 
-            # Создание всех графиков
-            self.stdout.write("Creating graphs...")
-            graphs = processor.create_all_graphs()
+        if not graphs:
+            return records
 
-            # Сохранение графиков ()
-            for graph_data in graphs:
-                Graph.objects.create(
+        # Создание всех графиков
+        self.stdout.write("Creating graphs...")
+        for graph_data in processor.create_all_graphs(workers=render_workers):
+            records[Graph].append(
+                Graph(
                     title=graph_data["title"],
                     image=graph_data["image"],
-                    graph_type=graph_data[
-                        "graph_type"
-                    ],
+                    graph_type=graph_data["graph_type"],
                     is_general=graph_data["is_general"],
                 )
-
-            self.stdout.write(self.style.SUCCESS("Successfully processed vacancy data"))
-
-            # Итоговая статистика
-            self.stdout.write(
-                f"Total statistics records: {SalaryStatistics.objects.count()}"
-            )
-            self.stdout.write(
-                f"Total geography records: {GeographyData.objects.count()}"
             )
-            self.stdout.write(f"Total skills records: {Skill.objects.count()}")
-            self.stdout.write(f"Total graphs: {Graph.objects.count()}")
 
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f"Error processing: {str(e)}"))
-            raise
+        return records
@@ -0,0 +1,53 @@
+import logging
+import time
+
+import requests
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from main.vacancies import refresh_feed_locked
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Refresh the latest PHP vacancies feed from api.hh.ru"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running and refresh the feed every --interval seconds",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=600,
+            help="Seconds between refreshes in --loop mode",
+        )
+
+    def handle(self, *args, **options):
+        if not options["loop"]:
+            self.refresh()
+            return
+
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                # Неожиданный ответ API или ошибка БД не останавливают цикл:
+                # следующая попытка - через --interval секунд
+                logger.exception("Latest vacancies refresh failed")
+                close_old_connections()
+            time.sleep(options["interval"])
+
+    def refresh(self):
+        try:
+            count = refresh_feed_locked()
+        except requests.RequestException as e:
+            self.stderr.write(f"Failed to refresh vacancies: {e}")
+            return
+
+        if count is None:
+            self.stdout.write("Refresh is already running, skipped")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Saved {count} vacancies"))
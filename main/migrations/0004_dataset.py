@@ -0,0 +1,84 @@
+# Generated by Django 5.1.4 on 2026-10-18 10:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def attach_existing_statistics(apps, schema_editor):
+    """Существующая статистика становится первым активным набором данных"""
+    Dataset = apps.get_model('main', 'Dataset')
+    models_with_data = [
+        apps.get_model('main', name)
+        for name in ('SalaryStatistics', 'GeographyData', 'Skill', 'Graph')
+    ]
+    if not any(model.objects.exists() for model in models_with_data):
+        return
+    dataset = Dataset.objects.create(source='', is_active=True)
+    for model in models_with_data:
+        model.objects.update(dataset=dataset)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0003_alter_mainpage_title'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Dataset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(blank=True, max_length=500, verbose_name='Источник')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создан')),
+                ('is_active', models.BooleanField(default=False, verbose_name='Активный')),
+            ],
+            options={
+                'verbose_name': 'Набор данных',
+                'verbose_name_plural': 'Наборы данных',
+                'ordering': ['-id'],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('is_active',), name='single_active_dataset')],
+            },
+        ),
+        migrations.AddField(
+            model_name='geographydata',
+            name='dataset',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='main.dataset', verbose_name='Набор данных'),
+        ),
+        migrations.AddField(
+            model_name='graph',
+            name='dataset',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='main.dataset', verbose_name='Набор данных'),
+        ),
+        migrations.AddField(
+            model_name='salarystatistics',
+            name='dataset',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='main.dataset', verbose_name='Набор данных'),
+        ),
+        migrations.AddField(
+            model_name='skill',
+            name='dataset',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='main.dataset', verbose_name='Набор данных'),
+        ),
+        migrations.RunPython(attach_existing_statistics, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='geographydata',
+            name='dataset',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.dataset', verbose_name='Набор данных'),
+        ),
+        migrations.AlterField(
+            model_name='graph',
+            name='dataset',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.dataset', verbose_name='Набор данных'),
+        ),
+        migrations.AlterField(
+            model_name='salarystatistics',
+            name='dataset',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.dataset', verbose_name='Набор данных'),
+        ),
+        migrations.AlterField(
+            model_name='skill',
+            name='dataset',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.dataset', verbose_name='Набор данных'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0004_dataset'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='activated_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Активирован'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0005_dataset_activated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lastvacancy',
+            name='fetched_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Загружено'),
+        ),
+        migrations.AddField(
+            model_name='lastvacancy',
+            name='salary_currency',
+            field=models.CharField(blank=True, max_length=10, verbose_name='Валюта'),
+        ),
+        migrations.AlterField(
+            model_name='lastvacancy',
+            name='description',
+            field=models.TextField(blank=True, verbose_name='Описание вакансии'),
+        ),
+        migrations.AlterField(
+            model_name='lastvacancy',
+            name='skills',
+            field=models.TextField(blank=True, verbose_name='Навыки'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0006_lastvacancy_feed'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='geographydata',
+            index=models.Index(fields=['dataset', 'is_general', '-average_salary'], name='geography_salary_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='graph',
+            index=models.Index(fields=['dataset', 'graph_type', 'year'], name='graph_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='skill',
+            index=models.Index(fields=['dataset', 'is_general', '-count'], name='skill_top_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='geographydata',
+            constraint=models.UniqueConstraint(fields=('dataset', 'city', 'year', 'is_general'), name='unique_city_year'),
+        ),
+        migrations.AddConstraint(
+            model_name='salarystatistics',
+            constraint=models.UniqueConstraint(fields=('dataset', 'year', 'is_general'), name='unique_salary_year'),
+        ),
+        migrations.AddConstraint(
+            model_name='skill',
+            constraint=models.UniqueConstraint(fields=('dataset', 'name', 'year', 'is_general'), name='unique_skill_year'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+def mark_all_years(apps, schema_editor):
+    """Прежние строки географии с годом 2024 - это сводка за все годы"""
+    GeographyData = apps.get_model('main', 'GeographyData')
+    GeographyData.objects.update(year=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0007_statistics_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='geographydata',
+            name='geography_salary_idx',
+        ),
+        migrations.AlterField(
+            model_name='geographydata',
+            name='year',
+            field=models.IntegerField(blank=True, null=True, verbose_name='Год'),
+        ),
+        migrations.RunPython(mark_all_years, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='geographydata',
+            index=models.Index(fields=['dataset', 'year', 'is_general', '-average_salary'], name='geography_salary_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='geographydata',
+            constraint=models.UniqueConstraint(condition=models.Q(('year__isnull', True)), fields=('dataset', 'city', 'is_general'), name='unique_city_all_years'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_php_profession(apps, schema_editor):
+    """Профессия PHP с прежними ключевыми словами фильтра"""
+    Profession = apps.get_model('main', 'Profession')
+    Profession.objects.get_or_create(
+        slug='php',
+        defaults={'name': 'PHP-программист', 'keywords': 'php\nпхп\nрнр'},
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_geography_by_year'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Profession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slug', models.SlugField(unique=True, verbose_name='Код')),
+                ('name', models.CharField(max_length=100, verbose_name='Название')),
+                ('keywords', models.TextField(help_text='По одному в строке, без учёта регистра', verbose_name='Ключевые слова')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Активна')),
+            ],
+            options={
+                'verbose_name': 'Профессия',
+                'verbose_name_plural': 'Профессии',
+                'ordering': ['slug'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProfessionStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField(verbose_name='Год')),
+                ('average_salary', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Средняя зарплата')),
+                ('vacancy_count', models.IntegerField(verbose_name='Количество вакансий')),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.dataset', verbose_name='Набор данных')),
+                ('profession', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.profession', verbose_name='Профессия')),
+            ],
+            options={
+                'verbose_name': 'Статистика профессии',
+                'verbose_name_plural': 'Статистика профессий',
+                'ordering': ['profession', 'year'],
+                'constraints': [models.UniqueConstraint(fields=('dataset', 'profession', 'year'), name='unique_profession_year')],
+            },
+        ),
+        migrations.RunPython(create_php_profession, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:00
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0009_profession_registry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DatasetState',
+            fields=[
+                ('dataset', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='state', serialize=False, to='main.dataset', verbose_name='Набор данных')),
+                ('aggregates', models.BinaryField(verbose_name='Агрегаты')),
+            ],
+            options={
+                'verbose_name': 'Агрегаты набора данных',
+                'verbose_name_plural': 'Агрегаты наборов данных',
+            },
+        ),
+        migrations.CreateModel(
+            name='IngestedFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=40, verbose_name='Хэш содержимого')),
+                ('source', models.CharField(blank=True, max_length=500, verbose_name='Источник')),
+                ('vacancy_count', models.IntegerField(verbose_name='Количество вакансий')),
+                ('ingested_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Загружен')),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.dataset', verbose_name='Набор данных')),
+            ],
+            options={
+                'verbose_name': 'Загруженный файл',
+                'verbose_name_plural': 'Загруженные файлы',
+                'ordering': ['ingested_at'],
+                'constraints': [models.UniqueConstraint(fields=('dataset', 'digest'), name='unique_ingested_file')],
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0010_dataset_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='geographydata',
+            name='salary_count',
+            field=models.IntegerField(blank=True, null=True, verbose_name='Число зарплат'),
+        ),
+        migrations.AddField(
+            model_name='geographydata',
+            name='salary_sketch',
+            field=models.BinaryField(blank=True, null=True, verbose_name='Скетч квантилей зарплат'),
+        ),
+        migrations.AddField(
+            model_name='geographydata',
+            name='salary_sum',
+            field=models.FloatField(blank=True, null=True, verbose_name='Сумма зарплат'),
+        ),
+        migrations.AddField(
+            model_name='geographydata',
+            name='salary_sumsq',
+            field=models.FloatField(blank=True, null=True, verbose_name='Сумма квадратов зарплат'),
+        ),
+        migrations.AddField(
+            model_name='professionstatistics',
+            name='salary_count',
+            field=models.IntegerField(blank=True, null=True, verbose_name='Число зарплат'),
+        ),
+        migrations.AddField(
+            model_name='professionstatistics',
+            name='salary_sketch',
+            field=models.BinaryField(blank=True, null=True, verbose_name='Скетч квантилей зарплат'),
+        ),
+        migrations.AddField(
+            model_name='professionstatistics',
+            name='salary_sum',
+            field=models.FloatField(blank=True, null=True, verbose_name='Сумма зарплат'),
+        ),
+        migrations.AddField(
+            model_name='professionstatistics',
+            name='salary_sumsq',
+            field=models.FloatField(blank=True, null=True, verbose_name='Сумма квадратов зарплат'),
+        ),
+        migrations.AddField(
+            model_name='salarystatistics',
+            name='salary_count',
+            field=models.IntegerField(blank=True, null=True, verbose_name='Число зарплат'),
+        ),
+        migrations.AddField(
+            model_name='salarystatistics',
+            name='salary_sketch',
+            field=models.BinaryField(blank=True, null=True, verbose_name='Скетч квантилей зарплат'),
+        ),
+        migrations.AddField(
+            model_name='salarystatistics',
+            name='salary_sum',
+            field=models.FloatField(blank=True, null=True, verbose_name='Сумма зарплат'),
+        ),
+        migrations.AddField(
+            model_name='salarystatistics',
+            name='salary_sumsq',
+            field=models.FloatField(blank=True, null=True, verbose_name='Сумма квадратов зарплат'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0011_salary_distribution'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='geographydata',
+            name='salary_p25',
+            field=models.FloatField(blank=True, null=True, verbose_name='Зарплата, 25-й перцентиль'),
+        ),
+        migrations.AddField(
+            model_name='geographydata',
+            name='salary_p50',
+            field=models.FloatField(blank=True, null=True, verbose_name='Медианная зарплата'),
+        ),
+        migrations.AddField(
+            model_name='geographydata',
+            name='salary_p75',
+            field=models.FloatField(blank=True, null=True, verbose_name='Зарплата, 75-й перцентиль'),
+        ),
+        migrations.AddField(
+            model_name='geographydata',
+            name='salary_p90',
+            field=models.FloatField(blank=True, null=True, verbose_name='Зарплата, 90-й перцентиль'),
+        ),
+        migrations.AddField(
+            model_name='professionstatistics',
+            name='salary_p25',
+            field=models.FloatField(blank=True, null=True, verbose_name='Зарплата, 25-й перцентиль'),
+        ),
+        migrations.AddField(
+            model_name='professionstatistics',
+            name='salary_p50',
+            field=models.FloatField(blank=True, null=True, verbose_name='Медианная зарплата'),
+        ),
+        migrations.AddField(
+            model_name='professionstatistics',
+            name='salary_p75',
+            field=models.FloatField(blank=True, null=True, verbose_name='Зарплата, 75-й перцентиль'),
+        ),
+        migrations.AddField(
+            model_name='professionstatistics',
+            name='salary_p90',
+            field=models.FloatField(blank=True, null=True, verbose_name='Зарплата, 90-й перцентиль'),
+        ),
+        migrations.AddField(
+            model_name='salarystatistics',
+            name='salary_p25',
+            field=models.FloatField(blank=True, null=True, verbose_name='Зарплата, 25-й перцентиль'),
+        ),
+        migrations.AddField(
+            model_name='salarystatistics',
+            name='salary_p50',
+            field=models.FloatField(blank=True, null=True, verbose_name='Медианная зарплата'),
+        ),
+        migrations.AddField(
+            model_name='salarystatistics',
+            name='salary_p75',
+            field=models.FloatField(blank=True, null=True, verbose_name='Зарплата, 75-й перцентиль'),
+        ),
+        migrations.AddField(
+            model_name='salarystatistics',
+            name='salary_p90',
+            field=models.FloatField(blank=True, null=True, verbose_name='Зарплата, 90-й перцентиль'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0012_salary_quantiles'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasetstate',
+            name='registry',
+            field=models.CharField(blank=True, default='', max_length=40, verbose_name='Хэш реестра профессий'),
+        ),
+    ]
@@ -1,4 +1,9 @@
+import math
+
 from django.db import models
+from django.utils import timezone
+
+from .sketch import QuantileSketch
 
 class MainPage(models.Model):
     """Модель для главной страницы"""
@@ -13,51 +18,172 @@ class MainPage(models.Model):
     def __str__(self):
         return self.title
 
+class Dataset(models.Model):
+    """Модель версии набора данных статистики"""
+    source = models.CharField('Источник', max_length=500, blank=True)
+    created_at = models.DateTimeField('Создан', auto_now_add=True)
+    activated_at = models.DateTimeField('Активирован', null=True, blank=True)
+    is_active = models.BooleanField('Активный', default=False)
+
+    class Meta:
+        verbose_name = 'Набор данных'
+        verbose_name_plural = 'Наборы данных'
+        ordering = ['-id']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['is_active'],
+                condition=models.Q(is_active=True),
+                name='single_active_dataset',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Набор данных #{self.pk} ({self.created_at:%d.%m.%Y %H:%M})"
+
+    @property
+    def updated_at(self):
+        """Момент, с которого данные этого набора отдаются на сайте"""
+        return self.activated_at or self.created_at
+
+class DatasetQuerySet(models.QuerySet):
+    """Выборка статистики из наборов данных"""
+
+    def active(self):
+        """Только записи активного набора данных"""
+        return self.filter(dataset__is_active=True)
+
+class SalaryDistribution(models.Model):
+    """
+    Суммы зарплат группы для точного слияния (по годам, городам, частям
+    данных) и скетч квантилей; среднее, отклонение и медиана считаются из них
+    """
+    salary_sum = models.FloatField('Сумма зарплат', null=True, blank=True)
+    salary_count = models.IntegerField('Число зарплат', null=True, blank=True)
+    salary_sumsq = models.FloatField('Сумма квадратов зарплат', null=True, blank=True)
+    salary_sketch = models.BinaryField('Скетч квантилей зарплат', null=True, blank=True)
+    # Квантили из скетча, посчитанные при записи (sketch.QUANTILES)
+    salary_p25 = models.FloatField('Зарплата, 25-й перцентиль', null=True, blank=True)
+    salary_p50 = models.FloatField('Медианная зарплата', null=True, blank=True)
+    salary_p75 = models.FloatField('Зарплата, 75-й перцентиль', null=True, blank=True)
+    salary_p90 = models.FloatField('Зарплата, 90-й перцентиль', null=True, blank=True)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def mean_salary(self):
+        """Средняя зарплата; у наборов без сумм - сохранённое среднее"""
+        if not self.salary_count:
+            return self.average_salary
+        return self.salary_sum / self.salary_count
+
+    @property
+    def salary_stddev(self):
+        """Выборочное стандартное отклонение зарплат или None"""
+        if not self.salary_count or self.salary_count < 2:
+            return None
+        variance = (self.salary_sumsq - self.salary_sum ** 2 / self.salary_count) / (self.salary_count - 1)
+        return math.sqrt(max(variance, 0))
+
+    def salary_quantile(self, q):
+        """Квантиль зарплат по скетчу (ошибка до 1%) или None"""
+        if not self.salary_sketch:
+            return None
+        return QuantileSketch.from_bytes(self.salary_sketch).quantile(q)
+
+    @property
+    def median_salary(self):
+        """Медианная зарплата: сохранённая при обработке или по скетчу, иначе None"""
+        if self.salary_p50 is not None:
+            return self.salary_p50
+        return self.salary_quantile(0.5)
+
 class Skill(models.Model):
     """Модель для навыков"""
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, verbose_name='Набор данных')
     name = models.CharField('Название навыка', max_length=100)
     year = models.IntegerField('Год')
     count = models.IntegerField('Количество упоминаний')
     is_general = models.BooleanField('Общая статистика', default=True)  # Добавляем это поле
 
+    objects = DatasetQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Навык'
         verbose_name_plural = 'Навыки'
         ordering = ['-count']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dataset', 'name', 'year', 'is_general'],
+                name='unique_skill_year',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['dataset', 'is_general', '-count'], name='skill_top_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.year})"
 
-class SalaryStatistics(models.Model):
+class SalaryStatistics(SalaryDistribution):
     """Модель для статистики зарплат"""
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, verbose_name='Набор данных')
     year = models.IntegerField('Год')
     average_salary = models.DecimalField('Средняя зарплата', max_digits=10, decimal_places=2)
     vacancy_count = models.IntegerField('Количество вакансий')
     is_general = models.BooleanField('Общая статистика', default=True)
 
+    objects = DatasetQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Статистика зарплат'
         verbose_name_plural = 'Статистика зарплат'
         ordering = ['year']
+        # Уникальный индекс (набор, год, тип) отдаёт строки набора уже по годам
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dataset', 'year', 'is_general'],
+                name='unique_salary_year',
+            ),
+        ]
 
     def __str__(self):
         return f"Статистика за {self.year} год"
 
-class GeographyData(models.Model):
+class GeographyData(SalaryDistribution):
     """Модель для географических данных"""
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, verbose_name='Набор данных')
     city = models.CharField('Город', max_length=100)
     average_salary = models.DecimalField('Средняя зарплата', max_digits=10, decimal_places=2)
     vacancy_share = models.DecimalField('Доля вакансий', max_digits=5, decimal_places=2)
-    year = models.IntegerField('Год')
+    # Пустой год - сводка по городу за все годы
+    year = models.IntegerField('Год', null=True, blank=True)
     is_general = models.BooleanField('Общая статистика', default=True)
 
+    objects = DatasetQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'География'
         verbose_name_plural = 'География'
         ordering = ['-average_salary']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dataset', 'city', 'year', 'is_general'],
+                name='unique_city_year',
+            ),
+            # NULL не участвует в уникальности, поэтому сводка за все годы - отдельно
+            models.UniqueConstraint(
+                fields=['dataset', 'city', 'is_general'],
+                condition=models.Q(year__isnull=True),
+                name='unique_city_all_years',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['dataset', 'year', 'is_general', '-average_salary'], name='geography_salary_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.city} ({self.year})"
+        return f"{self.city} ({self.year or 'все годы'})"
 
 class Graph(models.Model):
     """Модель для хранения графиков"""
@@ -68,17 +194,130 @@ class Graph(models.Model):
         ('geography', 'График географии'),
     ]
 
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, verbose_name='Набор данных')
     title = models.CharField('Заголовок', max_length=200)
     image = models.ImageField('График', upload_to='graphs/')
     graph_type = models.CharField('Тип графика', max_length=20, choices=GRAPH_TYPES)
     year = models.IntegerField('Год', null=True, blank=True)
     is_general = models.BooleanField('Общая статистика', default=True)
 
+    objects = DatasetQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'График'
         verbose_name_plural = 'Графики'
         ordering = ['graph_type', 'year']
+        indexes = [
+            models.Index(fields=['dataset', 'graph_type', 'year'], name='graph_type_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+
+class Profession(models.Model):
+    """Профессия реестра: вакансии размечаются по ключевым словам в названии"""
+    slug = models.SlugField('Код', unique=True)
+    name = models.CharField('Название', max_length=100)
+    keywords = models.TextField('Ключевые слова', help_text='По одному в строке, без учёта регистра')
+    is_active = models.BooleanField('Активна', default=True)
+
+    class Meta:
+        verbose_name = 'Профессия'
+        verbose_name_plural = 'Профессии'
+        ordering = ['slug']
+
+    def __str__(self):
+        return self.name
+
+    @property
+    def keyword_list(self):
+        return [keyword.strip() for keyword in self.keywords.splitlines() if keyword.strip()]
+
+class ProfessionStatistics(SalaryDistribution):
+    """Статистика зарплат профессии реестра по годам"""
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, verbose_name='Набор данных')
+    profession = models.ForeignKey(Profession, on_delete=models.CASCADE, verbose_name='Профессия')
+    year = models.IntegerField('Год')
+    average_salary = models.DecimalField('Средняя зарплата', max_digits=10, decimal_places=2)
+    vacancy_count = models.IntegerField('Количество вакансий')
+
+    objects = DatasetQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Статистика профессии'
+        verbose_name_plural = 'Статистика профессий'
+        ordering = ['profession', 'year']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dataset', 'profession', 'year'],
+                name='unique_profession_year',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.profession} за {self.year} год"
+
+
+class DatasetState(models.Model):
+    """
+    Полные агрегаты набора данных (суммы, количества, счётчики навыков),
+    из которых новый файл дозагружается без пересчёта прежних данных
+    """
+    dataset = models.OneToOneField(
+        Dataset, on_delete=models.CASCADE, primary_key=True, related_name='state',
+        verbose_name='Набор данных',
+    )
+    aggregates = models.BinaryField('Агрегаты')
+    # Агрегаты профессий верны только для реестра, с которым они посчитаны
+    registry = models.CharField('Хэш реестра профессий', max_length=40, blank=True, default='')
+
+    class Meta:
+        verbose_name = 'Агрегаты набора данных'
+        verbose_name_plural = 'Агрегаты наборов данных'
+
+    def __str__(self):
+        return f"Агрегаты набора #{self.dataset_id}"
+
+class IngestedFile(models.Model):
+    """Файл вакансий, вошедший в набор данных; по хэшу повторная загрузка пропускается"""
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, verbose_name='Набор данных')
+    digest = models.CharField('Хэш содержимого', max_length=40)
+    source = models.CharField('Источник', max_length=500, blank=True)
+    vacancy_count = models.IntegerField('Количество вакансий')
+    ingested_at = models.DateTimeField('Загружен', default=timezone.now)
+
+    objects = DatasetQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Загруженный файл'
+        verbose_name_plural = 'Загруженные файлы'
+        ordering = ['ingested_at']
+        constraints = [
+            models.UniqueConstraint(fields=['dataset', 'digest'], name='unique_ingested_file'),
+        ]
+
+    def __str__(self):
+        return self.source or self.digest
+
+
+class LastVacancy(models.Model):
+    """Модель для последних вакансий"""
+    title = models.CharField('Название вакансии', max_length=200)
+    description = models.TextField('Описание вакансии', blank=True)
+    skills = models.TextField('Навыки', blank=True)
+    company = models.CharField('Компания', max_length=200)
+    salary_from = models.DecimalField('Зарплата от', max_digits=10, decimal_places=2, null=True, blank=True)
+    salary_to = models.DecimalField('Зарплата до', max_digits=10, decimal_places=2, null=True, blank=True)
+    salary_currency = models.CharField('Валюта', max_length=10, blank=True)
+    region = models.CharField('Регион', max_length=100)
+    published_at = models.DateTimeField('Дата публикации')
+    fetched_at = models.DateTimeField('Загружено', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Последняя вакансия'
+        verbose_name_plural = 'Последние вакансии'
+        ordering = ['-published_at']
+
+    def __str__(self):
+        return self.title
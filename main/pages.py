@@ -0,0 +1,140 @@
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from .models import Dataset, SalaryStatistics, GeographyData, Skill, Graph, ProfessionStatistics
+
+# Ключ с версией активного набора данных: (id, момент активации)
+ACTIVE_VERSION_KEY = 'statistics:active-version'
+# Версия активного набора перепроверяется в БД не реже раза в минуту
+ACTIVE_VERSION_TIMEOUT = 60
+# Данные и страницы конкретной версии неизменны, поэтому хранятся долго
+VERSION_DATA_TIMEOUT = 24 * 60 * 60
+
+
+async def aactive_version():
+    """Версия активного набора данных: (id, момент активации) или None"""
+    version = await cache.aget(ACTIVE_VERSION_KEY)
+    if version is None:
+        dataset = await Dataset.objects.filter(is_active=True).afirst()
+        version = (dataset.pk, dataset.updated_at) if dataset else (0, None)
+        await cache.aset(ACTIVE_VERSION_KEY, version, ACTIVE_VERSION_TIMEOUT)
+    return version if version[0] else None
+
+
+def invalidate_statistics_cache():
+    """Сброс версии после смены активного набора данных"""
+    cache.delete(ACTIVE_VERSION_KEY)
+
+
+class StatisticsData:
+    """
+    Данные страниц статистики одного набора данных. Каждая модель читается
+    из БД один раз, альтернативные сортировки строятся в памяти.
+    """
+
+    def __init__(self, salary=(), geography=(), skills=(), graphs=(), professions=()):
+        self.salary = {True: [], False: []}
+        for stat in salary:
+            self.salary[stat.is_general].append(stat)
+
+        self.city_salary = {True: [], False: []}
+        for city in geography:
+            self.city_salary[city.is_general].append(city)
+        self.city_share = {
+            is_general: sorted(cities, key=lambda city: city.vacancy_share, reverse=True)
+            for is_general, cities in self.city_salary.items()
+        }
+
+        self.skills = {True: [], False: []}
+        for skill in skills:
+            self.skills[skill.is_general].append(skill)
+
+        self.graphs = {}
+        for graph in graphs:
+            self.graphs.setdefault((graph.graph_type, graph.is_general), []).append(graph)
+
+        # Статистика профессий реестра: код -> название и строки по годам
+        self.professions = {}
+        for stat in professions:
+            profession = self.professions.setdefault(
+                stat.profession.slug, {'name': stat.profession.name, 'statistics': []}
+            )
+            profession['statistics'].append(stat)
+
+    @classmethod
+    async def aload(cls, dataset_id, year=None):
+        """Данные набора; география - сводка за все годы или за год year"""
+        querysets = [
+            SalaryStatistics.objects.filter(dataset_id=dataset_id).order_by('year'),
+            # Порядок совпадает с индексами: сортировка выполняется по индексу
+            GeographyData.objects.filter(dataset_id=dataset_id, year=year).order_by('is_general', '-average_salary'),
+            Skill.objects.filter(dataset_id=dataset_id).order_by('is_general', '-count'),
+            Graph.objects.filter(dataset_id=dataset_id),
+            ProfessionStatistics.objects.filter(dataset_id=dataset_id).select_related('profession'),
+        ]
+        rows = []
+        for queryset in querysets:
+            rows.append([obj async for obj in queryset.aiterator()])
+        return cls(*rows)
+
+    @property
+    def years(self):
+        """Годы набора данных, доступные для среза географии"""
+        return [stat.year for stat in self.salary[True]]
+
+    def graphs_of(self, graph_type, is_general):
+        return self.graphs.get((graph_type, is_general), [])
+
+
+async def astatistics_data(year=None):
+    """Данные активного набора из кэша или из БД; year - срез географии"""
+    version = await aactive_version()
+    if version is None:
+        return StatisticsData()
+    key = f'statistics:data:{version[0]}:{"all" if year is None else year}'
+    data = await cache.aget(key)
+    if data is None:
+        data = await StatisticsData.aload(version[0], year)
+        await cache.aset(key, data, VERSION_DATA_TIMEOUT)
+    return data
+
+
+async def aselected_year(request):
+    """
+    Год из параметра ?year=, если он есть в активном наборе данных,
+    иначе None - сводка за все годы
+    """
+    year = request.GET.get('year', '')
+    # isdigit() верно и для '²', который int() не разбирает: только цифры ASCII
+    if not (year.isascii() and year.isdigit()):
+        return None
+    year = int(year)
+    return year if year in (await astatistics_data()).years else None
+
+
+def cache_statistics_page(view):
+    """
+    Кэширование отрендеренной страницы статистики для текущей версии данных.
+    Новая активная версия автоматически даёт новые ключи кэша. Ключ - путь
+    и проверенный год: прочие параметры запроса не плодят записи в кэше.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        version = await aactive_version()
+        if request.method != 'GET' or version is None:
+            return await view(request, *args, **kwargs)
+
+        year = await aselected_year(request)
+        key = f'statistics:page:{version[0]}:{request.path}:{"all" if year is None else year}'
+        cached = await cache.aget(key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+
+        response = await view(request, *args, **kwargs)
+        if response.status_code == 200:
+            await cache.aset(key, (response.content, response['Content-Type']), VERSION_DATA_TIMEOUT)
+        return response
+    return wrapper
@@ -0,0 +1,113 @@
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+# Профессия, по которой строятся страницы сайта (PHP статистика)
+PRIMARY_PROFESSION = 'php'
+
+# Реестр по умолчанию, если профессии не заданы в БД
+DEFAULT_PROFESSIONS = [
+    (PRIMARY_PROFESSION, ['php', 'пхп', 'рнр']),
+]
+
+
+class ProfessionMatcher:
+    """
+    Поиск ключевых слов всех профессий за один проход по строке
+    (автомат Ахо-Корасик). Результат - битовая маска: бит i установлен,
+    если в названии вакансии есть ключевое слово i-й профессии.
+    Регистр не учитывается, как в прежнем str.contains(case=False).
+    """
+
+    def __init__(self, professions):
+        self.slugs = [slug for slug, _ in professions]
+        if len(self.slugs) > 64:
+            raise ValueError('Не больше 64 профессий в одной маске')
+        self.bits = {slug: i for i, slug in enumerate(self.slugs)}
+        self.dtype = np.min_scalar_type((1 << max(len(self.slugs), 1)) - 1)
+
+        # Бор ключевых слов: переходы, суффиксные ссылки и маски найденных слов
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [0]
+        for i, (_, keywords) in enumerate(professions):
+            for keyword in keywords:
+                keyword = keyword.strip().lower()
+                if keyword:
+                    self._add(keyword, 1 << i)
+        self._build()
+
+    def _add(self, keyword, mask):
+        state = 0
+        for char in keyword:
+            if char not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(0)
+                self._goto[state][char] = len(self._goto) - 1
+            state = self._goto[state][char]
+        self._out[state] |= mask
+
+    def _build(self):
+        # Обход в ширину: суффиксная ссылка узла вычисляется по ссылке родителя,
+        # у детей корня она ведёт в корень
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, child in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._out[child] |= self._out[self._fail[child]]
+                queue.append(child)
+
+    def match(self, text):
+        """Маска профессий для одной строки"""
+        goto, fail, out = self._goto, self._fail, self._out
+        state, mask = 0, 0
+        for char in text.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            mask |= out[state]
+        return mask
+
+    def tag(self, names):
+        """
+        Маски профессий для столбца названий. Автомат запускается один раз
+        на каждое уникальное название, пустые названия получают маску 0.
+        """
+        codes, uniques = pd.factorize(names)
+        if not len(uniques):
+            return np.zeros(len(codes), dtype=self.dtype)
+        masks = np.fromiter(
+            (self.match(name) for name in uniques), dtype=self.dtype, count=len(uniques)
+        )
+        return np.where(codes >= 0, masks[codes], 0).astype(self.dtype)
+
+    def selects(self, tags, slug):
+        """Булева маска строк профессии slug"""
+        return (np.asarray(tags) >> self.dtype.type(self.bits[slug])) & 1 == 1
+
+
+def with_primary(professions):
+    """Реестр профессий, в котором обязательно есть основная профессия сайта"""
+    professions = list(professions or DEFAULT_PROFESSIONS)
+    if PRIMARY_PROFESSION not in [slug for slug, _ in professions]:
+        professions.insert(0, DEFAULT_PROFESSIONS[0])
+    return professions
+
+
+def registry_digest(professions):
+    """
+    Хэш реестра профессий (с основной профессией): коды и ключевые слова
+    без учёта порядка и регистра, как их сопоставляет ProfessionMatcher
+    """
+    registry = sorted(
+        (slug, sorted({keyword.lower() for keyword in keywords}))
+        for slug, keywords in with_primary(professions)
+    )
+    data = json.dumps(registry, ensure_ascii=False).encode('utf-8')
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
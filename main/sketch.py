@@ -0,0 +1,71 @@
+import numpy as np
+
+# Относительная точность квантилей: ошибка не больше 1% значения
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+LOG_GAMMA = np.log(GAMMA)
+
+# Квантили, которые сохраняются в статистике: суффикс поля -> уровень
+QUANTILES = {'p25': 0.25, 'p50': 0.5, 'p75': 0.75, 'p90': 0.9}
+
+# Формат в БД: номера корзин int16, затем счётчики uint32
+BUCKET_DTYPE = np.dtype('<i2')
+COUNT_DTYPE = np.dtype('<u4')
+
+
+def bucket_ids(values):
+    """Номера логарифмических корзин для зарплат; значения меньше 1 идут в корзину 0"""
+    values = np.maximum(np.asarray(values, dtype='float64'), 1.0)
+    return np.ceil(np.log(values) / LOG_GAMMA).astype(BUCKET_DTYPE)
+
+
+class QuantileSketch:
+    """
+    Скетч квантилей с относительной ошибкой (DDSketch): корзина k содержит
+    значения из (GAMMA^(k-1), GAMMA^k]. Слияние - сложение счётчиков корзин,
+    поэтому оно точное и не зависит от порядка частей, а число корзин
+    ограничено диапазоном зарплат (около 800 до 10 млн).
+    """
+
+    def __init__(self, buckets=(), counts=()):
+        buckets = np.asarray(buckets, dtype=BUCKET_DTYPE)
+        order = np.argsort(buckets, kind='stable')
+        self.buckets = buckets[order]
+        self.counts = np.asarray(counts, dtype='int64')[order]
+
+    @classmethod
+    def from_values(cls, values):
+        buckets, counts = np.unique(bucket_ids(values), return_counts=True)
+        return cls(buckets, counts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        data = bytes(data)
+        size = len(data) // (BUCKET_DTYPE.itemsize + COUNT_DTYPE.itemsize)
+        buckets = np.frombuffer(data, dtype=BUCKET_DTYPE, count=size)
+        counts = np.frombuffer(data, dtype=COUNT_DTYPE, count=size, offset=size * BUCKET_DTYPE.itemsize)
+        return cls(buckets, counts)
+
+    def to_bytes(self):
+        return self.buckets.astype(BUCKET_DTYPE).tobytes() + self.counts.astype(COUNT_DTYPE).tobytes()
+
+    def merge(self, other):
+        buckets, inverse = np.unique(np.concatenate([self.buckets, other.buckets]), return_inverse=True)
+        counts = np.bincount(inverse, weights=np.concatenate([self.counts, other.counts]), minlength=len(buckets))
+        return QuantileSketch(buckets, counts.astype('int64'))
+
+    @property
+    def count(self):
+        return int(self.counts.sum())
+
+    def quantiles(self, qs):
+        """Квантили qs (от 0 до 1) за один проход по счётчикам; None для пустого скетча"""
+        if not self.count:
+            return [None] * len(qs)
+        ranks = np.asarray(qs, dtype='float64') * (self.count - 1)
+        indexes = np.searchsorted(np.cumsum(self.counts), ranks, side='right')
+        # Середина корзины в смысле относительной ошибки
+        return (2 * GAMMA ** self.buckets[indexes].astype('float64') / (GAMMA + 1)).tolist()
+
+    def quantile(self, q):
+        return self.quantiles([q])[0]
@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+
+class SkillIds:
+    """
+    Навыки вакансий в виде массивов целых чисел вместо строк key_skills:
+    id навыков всех строк подряд и смещения, с которых начинаются навыки
+    каждой строки (навыки строки i - ids[offsets[i]:offsets[i + 1]]).
+    """
+
+    def __init__(self, offsets, ids, vocabulary):
+        self.offsets = offsets
+        self.ids = ids
+        self.vocabulary = pd.Index(vocabulary)
+
+    @classmethod
+    def from_series(cls, key_skills):
+        """Разбор столбца key_skills (навыки через перевод строки)"""
+        has_skills = key_skills.notna().to_numpy()
+        lists = key_skills[has_skills].str.split('\n')
+        lengths = np.zeros(len(key_skills), dtype='int64')
+        lengths[has_skills] = lists.str.len().to_numpy(dtype='int64')
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        ids, vocabulary = pd.factorize(lists.explode().to_numpy(dtype=object))
+        return cls(offsets.astype(np.int32), ids.astype(np.int32), vocabulary)
+
+    @property
+    def rows(self):
+        """Позиция исходной строки для каждого навыка"""
+        return np.repeat(np.arange(len(self.offsets) - 1), np.diff(self.offsets))
+
+    @property
+    def nbytes(self):
+        return self.offsets.nbytes + self.ids.nbytes + self.vocabulary.memory_usage(deep=True)
+
+
+class SkillCounts:
+    """
+    Частоты навыков по годам: словарь навыков с целочисленными id
+    и матрица счётчиков (год, навык).
+    """
+
+    def __init__(self, years, vocabulary, matrix):
+        self.years = pd.Index(years)
+        # Навыки в порядке первого появления; id навыка - позиция в словаре
+        self.vocabulary = pd.Index(vocabulary)
+        self.matrix = matrix
+
+    @classmethod
+    def empty(cls):
+        return cls(pd.Index([], dtype='float64'), pd.Index([], dtype=object),
+                   np.zeros((0, 0), dtype='int64'))
+
+    @classmethod
+    def from_frame(cls, df, subsets=()):
+        """
+        Подсчёт пар (год, навык) за один проход по key_skills.
+        subsets - булевы маски строк df; для каждой возвращаются отдельные
+        счётчики с тем же словарём, без повторного разбора строк.
+        """
+        return cls.from_ids(df['year'], SkillIds.from_series(df['key_skills']), subsets)
+
+    @classmethod
+    def from_ids(cls, year, skill_ids, subsets=()):
+        """Подсчёт по уже разобранным навыкам (SkillIds) строк со столбцом year"""
+        rows = skill_ids.rows
+        year_ids, years = pd.factorize(year.to_numpy(dtype='float64', na_value=np.nan)[rows])
+
+        # Вакансии без даты не попадают ни в один год
+        valid = year_ids >= 0
+        result = []
+        for mask in (None, *subsets):
+            selected = valid if mask is None else valid & np.asarray(mask)[rows]
+            result.append(cls._count(
+                years, skill_ids.vocabulary, year_ids[selected], skill_ids.ids[selected]
+            ))
+        return result
+
+    @classmethod
+    def _count(cls, years, vocabulary, year_ids, skill_ids):
+        size = len(years) * len(vocabulary)
+        matrix = np.bincount(
+            year_ids * len(vocabulary) + skill_ids, minlength=size
+        ).reshape(len(years), len(vocabulary))
+        return cls(years, vocabulary, matrix)
+
+    def merge(self, other):
+        """Слияние со счётчиками другой части данных"""
+        years = self.years.append(other.years[~other.years.isin(self.years)])
+        vocabulary = self.vocabulary.append(other.vocabulary[~other.vocabulary.isin(self.vocabulary)])
+        matrix = np.zeros((len(years), len(vocabulary)), dtype='int64')
+        matrix[:len(self.years), :len(self.vocabulary)] = self.matrix
+        matrix[np.ix_(years.get_indexer(other.years), vocabulary.get_indexer(other.vocabulary))] += other.matrix
+        self.years, self.vocabulary, self.matrix = years, vocabulary, matrix
+        return self
+
+    def _top(self, counts, top):
+        # Стабильная сортировка: при равной частоте раньше идёт навык, встреченный первым
+        order = np.argsort(-counts, kind='stable')[:top]
+        order = order[counts[order] > 0]
+        return pd.Series(
+            counts[order], index=self.vocabulary[order].rename('key_skills'), name='count'
+        )
+
+    def top_by_year(self, top=20):
+        """ТОП навыков для каждого года"""
+        return {
+            year: self._top(self.matrix[i], top)
+            for i, year in enumerate(self.years)
+            if self.matrix[i].any()
+        }
+
+    def top_overall(self, top=20):
+        """ТОП навыков за все годы"""
+        return self._top(self.matrix.sum(axis=0), top)
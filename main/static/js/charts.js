@@ -0,0 +1,210 @@
+// Отрисовка графиков статистики на клиенте по данным JSON API.
+// Блок .graph с атрибутом data-chart получает canvas вместо PNG;
+// если данные не загрузились, остаётся серверная картинка.
+(function () {
+    'use strict';
+
+    var PALETTE = ['#8dd3c7', '#ffffb3', '#bebada', '#fb8072', '#80b1d3',
+                   '#fdb462', '#b3de69', '#fccde5', '#d9d9d9', '#bc80bd'];
+    var PADDING = {top: 50, right: 20, bottom: 90, left: 80};
+    // Цвета линий графика с несколькими рядами (квантили)
+    var SERIES_COLORS = ['#80b1d3', '#2c3e50', '#fb8072', '#bc80bd'];
+
+    function formatNumber(value) {
+        return Math.round(value).toLocaleString('ru-RU');
+    }
+
+    function prepareCanvas(container) {
+        var canvas = document.createElement('canvas');
+        var ratio = window.devicePixelRatio || 1;
+        var width = container.clientWidth || 800;
+        var height = Math.round(width / 2);
+        canvas.width = width * ratio;
+        canvas.height = height * ratio;
+        canvas.style.width = '100%';
+        var ctx = canvas.getContext('2d');
+        ctx.scale(ratio, ratio);
+        ctx.font = '12px Arial, sans-serif';
+        return {canvas: canvas, ctx: ctx, width: width, height: height};
+    }
+
+    function drawTitle(c, title) {
+        c.ctx.save();
+        c.ctx.font = 'bold 14px Arial, sans-serif';
+        c.ctx.textAlign = 'center';
+        c.ctx.fillStyle = '#333';
+        c.ctx.fillText(title, c.width / 2, 24);
+        c.ctx.restore();
+    }
+
+    function drawAxes(c, maxValue) {
+        var ctx = c.ctx;
+        var plotHeight = c.height - PADDING.top - PADDING.bottom;
+        ctx.strokeStyle = '#ddd';
+        ctx.fillStyle = '#333';
+        ctx.textAlign = 'right';
+        ctx.setLineDash([4, 4]);
+        for (var i = 0; i <= 5; i++) {
+            var y = PADDING.top + plotHeight - plotHeight * i / 5;
+            ctx.beginPath();
+            ctx.moveTo(PADDING.left, y);
+            ctx.lineTo(c.width - PADDING.right, y);
+            ctx.stroke();
+            ctx.fillText(formatNumber(maxValue * i / 5), PADDING.left - 6, y + 4);
+        }
+        ctx.setLineDash([]);
+    }
+
+    function drawLabel(c, text, x) {
+        var ctx = c.ctx;
+        ctx.save();
+        ctx.translate(x, c.height - PADDING.bottom + 12);
+        ctx.rotate(-Math.PI / 4);
+        ctx.textAlign = 'right';
+        ctx.fillStyle = '#333';
+        ctx.fillText(String(text), 0, 0);
+        ctx.restore();
+    }
+
+    function drawSeries(c, data, kind) {
+        var ctx = c.ctx;
+        var values = data.values;
+        var maxValue = Math.max.apply(null, values.concat([0])) * 1.1 || 1;
+        var plotWidth = c.width - PADDING.left - PADDING.right;
+        var plotHeight = c.height - PADDING.top - PADDING.bottom;
+        var step = plotWidth / values.length;
+        drawAxes(c, maxValue);
+
+        ctx.beginPath();
+        values.forEach(function (value, i) {
+            var x = PADDING.left + step * (i + 0.5);
+            var y = PADDING.top + plotHeight - plotHeight * value / maxValue;
+            if (kind === 'bar') {
+                ctx.fillStyle = PALETTE[i % PALETTE.length];
+                ctx.fillRect(x - step * 0.4, y, step * 0.8, PADDING.top + plotHeight - y);
+            } else if (i === 0) {
+                ctx.moveTo(x, y);
+            } else {
+                ctx.lineTo(x, y);
+            }
+            drawLabel(c, data.labels[i], x);
+        });
+        if (kind === 'line') {
+            ctx.strokeStyle = '#2c3e50';
+            ctx.lineWidth = 2;
+            ctx.stroke();
+            ctx.fillStyle = '#2c3e50';
+            values.forEach(function (value, i) {
+                ctx.beginPath();
+                ctx.arc(PADDING.left + step * (i + 0.5),
+                        PADDING.top + plotHeight - plotHeight * value / maxValue, 4, 0, 2 * Math.PI);
+                ctx.fill();
+            });
+        }
+    }
+
+    function drawLines(c, data) {
+        var ctx = c.ctx;
+        var all = [0];
+        data.series.forEach(function (series) {
+            all = all.concat(series.values.filter(function (value) { return value !== null; }));
+        });
+        var maxValue = Math.max.apply(null, all) * 1.1 || 1;
+        var plotWidth = c.width - PADDING.left - PADDING.right;
+        var plotHeight = c.height - PADDING.top - PADDING.bottom;
+        var step = plotWidth / data.labels.length;
+        drawAxes(c, maxValue);
+        data.labels.forEach(function (label, i) {
+            drawLabel(c, label, PADDING.left + step * (i + 0.5));
+        });
+
+        data.series.forEach(function (series, n) {
+            var color = SERIES_COLORS[n % SERIES_COLORS.length];
+            var started = false;
+            ctx.beginPath();
+            series.values.forEach(function (value, i) {
+                if (value === null) {
+                    return;
+                }
+                var x = PADDING.left + step * (i + 0.5);
+                var y = PADDING.top + plotHeight - plotHeight * value / maxValue;
+                if (started) {
+                    ctx.lineTo(x, y);
+                } else {
+                    ctx.moveTo(x, y);
+                    started = true;
+                }
+            });
+            ctx.strokeStyle = color;
+            ctx.lineWidth = 2;
+            ctx.stroke();
+
+            // Легенда в строку над графиком
+            var legendX = PADDING.left + n * 110;
+            ctx.fillStyle = color;
+            ctx.fillRect(legendX, PADDING.top - 16, 12, 12);
+            ctx.fillStyle = '#333';
+            ctx.textAlign = 'left';
+            ctx.fillText(series.name, legendX + 16, PADDING.top - 6);
+        });
+    }
+
+    function drawPie(c, data) {
+        var ctx = c.ctx;
+        var total = data.values.reduce(function (a, b) { return a + b; }, 0) || 1;
+        var radius = Math.min(c.width, c.height - PADDING.top) / 2 - 40;
+        var cx = c.width / 2;
+        var cy = PADDING.top + (c.height - PADDING.top) / 2;
+        var angle = -Math.PI / 2;
+        data.values.forEach(function (value, i) {
+            var slice = 2 * Math.PI * value / total;
+            ctx.beginPath();
+            ctx.moveTo(cx, cy);
+            ctx.arc(cx, cy, radius, angle, angle + slice);
+            ctx.fillStyle = PALETTE[i % PALETTE.length];
+            ctx.fill();
+            var middle = angle + slice / 2;
+            ctx.fillStyle = '#333';
+            ctx.textAlign = Math.cos(middle) >= 0 ? 'left' : 'right';
+            ctx.fillText(data.labels[i] + ' (' + (100 * value / total).toFixed(1) + '%)',
+                         cx + Math.cos(middle) * (radius + 10), cy + Math.sin(middle) * (radius + 10));
+            angle += slice;
+        });
+    }
+
+    function render(container, data) {
+        if (!data.values.length) {
+            return;
+        }
+        if (data.limit) {
+            data.labels = data.labels.slice(0, data.limit);
+            data.values = data.values.slice(0, data.limit);
+        }
+        var c = prepareCanvas(container);
+        drawTitle(c, data.title);
+        if (data.chart === 'pie') {
+            drawPie(c, data);
+        } else if (data.series) {
+            drawLines(c, data);
+        } else {
+            drawSeries(c, data, data.chart);
+        }
+        container.innerHTML = '';
+        container.appendChild(c.canvas);
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        var containers = document.querySelectorAll('.graph[data-chart]');
+        Array.prototype.forEach.call(containers, function (container) {
+            fetch(container.getAttribute('data-chart'), {credentials: 'same-origin'})
+                .then(function (response) {
+                    if (!response.ok) {
+                        throw new Error(response.statusText);
+                    }
+                    return response.json();
+                })
+                .then(function (data) { render(container, data); })
+                .catch(function () { /* остаётся PNG */ });
+        });
+    });
+})();
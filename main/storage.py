@@ -0,0 +1,59 @@
+import time
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    Dataset, SalaryStatistics, GeographyData, Skill, Graph, ProfessionStatistics, DatasetState, IngestedFile
+)
+from .pages import invalidate_statistics_cache
+
+# Модели набора данных в порядке записи
+DATASET_MODELS = [
+    SalaryStatistics, GeographyData, Skill, Graph, ProfessionStatistics, DatasetState, IngestedFile
+]
+
+
+def activate_dataset(dataset):
+    """Атомарное переключение активного набора данных"""
+    activated_at = timezone.now()
+    with transaction.atomic():
+        Dataset.objects.filter(is_active=True).exclude(pk=dataset.pk).update(is_active=False)
+        Dataset.objects.filter(pk=dataset.pk).update(is_active=True, activated_at=activated_at)
+        # Страницы и данные новой версии кэшируются под новыми ключами
+        transaction.on_commit(invalidate_statistics_cache)
+    dataset.is_active = True
+    dataset.activated_at = activated_at
+
+
+def prune_datasets(keep):
+    """Удаление старых наборов данных, кроме последних keep и активного"""
+    stale = Dataset.objects.filter(is_active=False).order_by('-id')[max(keep - 1, 0):]
+    stale_ids = list(stale.values_list('id', flat=True))
+    Dataset.objects.filter(id__in=stale_ids).delete()
+    return len(stale_ids)
+
+
+def publish_dataset(records, source='', batch_size=500, keep=3):
+    """
+    Запись нового набора данных рядом с текущим и его активация.
+    records - словарь {модель: [несохранённые объекты]}.
+    Запись и переключение выполняются одной транзакцией: до её завершения
+    страницы читают прежний активный набор, при ошибке он остаётся активным.
+    Возвращает набор данных, число записанных строк и время в секундах.
+    """
+    start = time.perf_counter()
+    rows = 0
+    with transaction.atomic():
+        dataset = Dataset.objects.create(source=source)
+        for model in DATASET_MODELS:
+            objects = records.get(model, [])
+            for obj in objects:
+                obj.dataset = dataset
+            model.objects.bulk_create(objects, batch_size=batch_size)
+            rows += len(objects)
+        activate_dataset(dataset)
+    elapsed = time.perf_counter() - start
+
+    prune_datasets(keep)
+    return dataset, rows, elapsed
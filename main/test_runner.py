@@ -0,0 +1,29 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class IsolatedCacheRunner(DiscoverRunner):
+    """
+    Тесты работают со своим файлом кэша во временном каталоге:
+    cache.clear() в тестах не трогает общий кэш работающего сайта,
+    а параллельные запуски тестов не мешают друг другу.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._cache_directory = tempfile.mkdtemp(prefix='ulearnsite-test-cache-')
+        caches = {alias: dict(config) for alias, config in settings.CACHES.items()}
+        for alias, config in caches.items():
+            if config['BACKEND'] == 'main.cache.SQLiteCache':
+                config['LOCATION'] = f'{self._cache_directory}/{alias}.sqlite3'
+        self._cache_override = override_settings(CACHES=caches)
+        self._cache_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._cache_override.disable()
+        shutil.rmtree(self._cache_directory, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -1,3 +1,1090 @@
-from django.test import TestCase
+import asyncio
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from asgiref.sync import async_to_sync
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .frame_cache import cache_paths, file_digest
+from .cache import SQLiteCache
+from .charts import evict_charts, read_index, render_charts
+from .currency import (
+    CURRENCY_RATES, HistoricalCurrencyRates, StaticCurrencyRates, load_currency_rates
+)
+from .dates import parse_published_at
+from .hh import AsyncHHClient, HHClient
+from .models import (
+    Dataset, GeographyData, Graph, IngestedFile, LastVacancy, Profession, ProfessionStatistics,
+    SalaryStatistics, Skill
+)
+from .professions import ProfessionMatcher
+from .sketch import QuantileSketch
+from .skills import SkillCounts
+from .utils import DataProcessor, convert_salaries_to_rub, convert_salary_to_rub
+from . import vacancies
+from .vacancies import (
+    FEED_KEY, FEED_LOCK_KEY, alatest_feed, arefresh_feed_locked, refresh_feed, refresh_feed_locked
+)
+
+VACANCY_ROWS = [
+    ['PHP-программист', 'PHP\nMySQL\nGit', '80000', '120000', 'RUR', 'Москва', '2019-03-01T10:00:00+0300'],
+    ['Senior PHP Developer', 'PHP\nLaravel', '3000', '', 'USD', 'Москва', '2019-05-12T11:00:00+0300'],
+    ['Python-разработчик', 'Python\nDjango\nGit', '', '150000', 'RUR', 'Санкт-Петербург', '2019-07-01T09:30:00+0300'],
+    ['Программист 1С', '', '60000', '60000', 'RUR', 'Екатеринбург', '2020-01-15T12:00:00+0300'],
+    ['Backend разработчик (пхп)', 'PHP\nSymfony\nMySQL', '200000', '300000', 'KZT', 'Алматы', '2020-02-20T08:00:00+0600'],
+    ['Java Developer', 'Java\nSpring\nGit', '2000', '4000', 'EUR', 'Москва', '2020-06-01T15:00:00+0300'],
+    ['Frontend', 'JavaScript\nReact', '0', '0', 'RUR', 'Казань', '2020-06-02T15:00:00+0300'],
+    ['Аналитик', 'SQL', '50000', '', 'XXX', 'Москва', '2021-01-01T00:00:00+0300'],
+    ['PHP Team Lead', 'PHP\nGit\nDocker', '250000', '', 'RUR', 'Санкт-Петербург', '2021-02-01T00:00:00+0300'],
+    ['Тестировщик', 'QA', '40000', '70000', 'RUR', 'Новосибирск', 'broken-date'],
+    ['DevOps', 'Docker\nKubernetes\nGit', '20000000', '', 'RUR', 'Москва', '2021-03-01T00:00:00+0300'],
+    ['Middle PHP', 'PHP\nDocker', '', '180000', 'RUR', 'Москва', '2021-04-01T00:00:00+0300'],
+]
+
+
+def write_vacancies_csv(rows):
+    """Запись тестовых вакансий во временный CSV без заголовка"""
+    handle, path = tempfile.mkstemp(suffix='.csv')
+    with os.fdopen(handle, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerows(rows)
+    return path
+
+
+class StubHHServer:
+    """
+    Локальный заглушечный сервер API hh.ru: поиск возвращает count вакансий,
+    каждая детальная страница отвечает с задержкой delay секунд.
+    """
+
+    def __init__(self, count=8, delay=0.2, broken=()):
+        self.count = count
+        self.delay = delay
+        self.broken = set(broken)
+        self.connections = 0
+        self.requests = []
+        # Число одновременно обрабатываемых запросов деталей и его максимум
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                stub.connections += 1
+
+            def do_GET(self):
+                path = self.path.split('?')[0]
+                stub.requests.append(path)
+                if path == '/vacancies':
+                    self.send_json(200, {'items': [stub.item(i) for i in range(stub.count)]})
+                elif path.rsplit('/', 1)[-1] in stub.broken:
+                    self.send_json(500, {})
+                else:
+                    with stub.lock:
+                        stub.active += 1
+                        stub.max_active = max(stub.max_active, stub.active)
+                    time.sleep(stub.delay)
+                    with stub.lock:
+                        stub.active -= 1
+                    vacancy_id = path.rsplit('/', 1)[-1]
+                    self.send_json(200, {
+                        'key_skills': [{'name': 'PHP'}, {'name': f'Skill {vacancy_id}'}],
+                        'description': f'Описание {vacancy_id}',
+                    })
+
+            def send_json(self, status, data):
+                body = json.dumps(data).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        # Клиент с коротким таймаутом закрывает соединение раньше ответа
+        self.server.handle_error = lambda request, client_address: None
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @staticmethod
+    def item(i):
+        return {
+            'id': str(i),
+            'name': f'PHP разработчик {i}',
+            'employer': {'name': f'Компания {i}'},
+            'area': {'name': 'Москва'},
+            'published_at': f'2024-12-0{i % 9 + 1}T10:00:00+0300',
+            'salary': {'from': 100000, 'to': None, 'currency': 'RUR'} if i % 2 == 0 else None,
+        }
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class StreamingProcessingTest(TestCase):
+    """Потоковая обработка должна совпадать с обработкой в памяти"""
+
+    def setUp(self):
+        self.csv_path = write_vacancies_csv(VACANCY_ROWS * 3)
+        self.addCleanup(os.remove, self.csv_path)
+
+    def test_chunked_results_match_in_memory(self):
+        in_memory = DataProcessor(self.csv_path)
+        for chunksize, workers in ((1, 1), (5, 1), (100, 1), (4, 2)):
+            streamed = DataProcessor(self.csv_path, chunksize=chunksize, workers=workers)
+
+            for expected, actual in zip(in_memory.process_salary_statistics(),
+                                        streamed.process_salary_statistics()):
+                pd.testing.assert_series_equal(actual, expected,
+                                               check_dtype=False, check_index_type=False)
+
+            for expected, actual in zip(in_memory.process_geography_data(),
+                                        streamed.process_geography_data()):
+                pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+            for expected, actual in zip(in_memory.process_geography_by_year(),
+                                        streamed.process_geography_by_year()):
+                pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+            for expected, actual in zip(in_memory.process_skills(), streamed.process_skills()):
+                self.assertEqual(expected.keys(), actual.keys())
+                for year in expected:
+                    self.assertEqual(list(expected[year].items()), list(actual[year].items()))
+
+
+class CompactFrameTest(TestCase):
+    """Компактное представление вакансий в памяти"""
+
+    def setUp(self):
+        self.csv_path = write_vacancies_csv(VACANCY_ROWS * 500)
+        self.addCleanup(os.remove, self.csv_path)
+
+    def test_compact_dtypes(self):
+        df = DataProcessor(self.csv_path).df
+        self.assertEqual(df['area_name'].dtype, 'category')
+        self.assertEqual(df['salary_currency'].dtype, 'category')
+        self.assertEqual(df['salary_rub'].dtype, 'float32')
+        self.assertEqual(df['year'].dtype, 'Int16')
+        self.assertNotIn('name', df.columns)
+        self.assertNotIn('key_skills', df.columns)
+
+    def test_footprint_is_three_times_smaller(self):
+        raw = DataProcessor._read_csv(self.csv_path).memory_usage(deep=True).sum()
+        self.assertLessEqual(DataProcessor(self.csv_path).memory_usage() * 3, raw)
+
+
+class ProfessionMatcherTest(TestCase):
+
+    def setUp(self):
+        self.matcher = ProfessionMatcher([
+            ('php', ['php', 'пхп', 'рнр']),
+            ('python', ['python', 'django']),
+            ('lead', ['lead', 'team lead']),
+        ])
+
+    def test_matches_like_regex(self):
+        names = pd.Series([row[0] for row in VACANCY_ROWS] + [None])
+        tags = self.matcher.tag(names)
+        expected = names.str.contains('php|пхп|рнр', case=False, na=False).to_numpy()
+        np.testing.assert_array_equal(self.matcher.selects(tags, 'php'), expected)
+        self.assertEqual(tags.dtype, np.uint8)
+
+    def test_overlapping_keywords(self):
+        self.assertEqual(self.matcher.match('PHP Team Lead'), 0b101)
+        self.assertEqual(self.matcher.match('Python/Django'), 0b010)
+        self.assertEqual(self.matcher.match('Java'), 0)
+
+    def test_profession_statistics_in_one_pass(self):
+        csv_path = write_vacancies_csv(VACANCY_ROWS * 2)
+        self.addCleanup(os.remove, csv_path)
+        professions = [('python', ['python']), ('php', ['php', 'пхп', 'рнр'])]
+        in_memory = DataProcessor(csv_path, professions=professions)
+        streamed = DataProcessor(csv_path, chunksize=5, professions=professions)
+        expected = in_memory.process_profession_statistics()
+        pd.testing.assert_frame_equal(streamed.process_profession_statistics(), expected, check_dtype=False)
+
+        # Строки PHP в реестре совпадают с PHP статистикой страниц
+        php = expected.loc['php']
+        self.assertEqual(php['name'].tolist(), in_memory.process_salary_statistics()[3].tolist())
+        self.assertEqual(expected.loc['python'].index.tolist(), [2019])
+
+
+class SalaryConversionTest(TestCase):
+    """Векторная конвертация зарплат должна совпадать с построчной"""
+
+    def test_matches_row_wise_conversion(self):
+        df = pd.DataFrame({
+            'salary_from': [np.nan, 100, np.nan, 0, 0, 100, 100, 100, 50, -10, 0],
+            'salary_to': [np.nan, np.nan, 200, 0, np.nan, 0, 300, 300, 50, 10, 100],
+            'salary_currency': ['RUR', 'USD', 'EUR', 'RUR', 'RUR', 'KZT', None, 'XXX', 'BYR', 'UAH', 'GEL'],
+            'published_at': pd.NaT,
+        })
+        expected = df.apply(convert_salary_to_rub, axis=1, args=(CURRENCY_RATES,))
+        actual = convert_salaries_to_rub(df, StaticCurrencyRates())
+        pd.testing.assert_series_equal(actual, expected.astype('float64'))
+
+
+class PublishedAtParsingTest(TestCase):
+    """Разбор published_at со смещением часового пояса"""
+
+    def test_offsets_are_kept(self):
+        values = pd.Series([
+            '2022-07-05T18:19:30+0300', '2020-06-01T15:00:00-0500', '2021-01-01T00:00:00+0300',
+            '2021-03-01T10:00:00+03:00', '2021-03-01T10:00:00.000Z',
+            '2021-02-30T10:00:00+0300', 'broken', None,
+        ], dtype='str')
+        published_at, years = parse_published_at(values)
+        self.assertEqual(str(published_at.dt.tz), 'UTC')
+        self.assertEqual(published_at[:5].astype(str).tolist(), [
+            '2022-07-05 15:19:30+00:00', '2020-06-01 20:00:00+00:00',
+            '2020-12-31 21:00:00+00:00', '2021-03-01 07:00:00+00:00', '2021-03-01 10:00:00+00:00',
+        ])
+        self.assertTrue(published_at[5:].isna().all())
+        # Год - по местной дате публикации
+        self.assertEqual(years.tolist(), [2022, 2020, 2021, 2021, 2021, pd.NA, pd.NA, pd.NA])
+
+    def test_fallback_uses_local_year(self):
+        # Один и тот же момент в двух записях смещения даёт один и тот же год
+        values = pd.Series([
+            '2020-01-01T01:00:00+0300', '2020-01-01T01:00:00+03:00',
+            '2019-12-31T23:00:00-0500', '2019-12-31T23:00:00-05:00',
+        ], dtype='str')
+        published_at, years = parse_published_at(values)
+        self.assertEqual(published_at[0], published_at[1])
+        self.assertEqual(published_at[2], published_at[3])
+        self.assertEqual(years.tolist(), [2020, 2020, 2019, 2019])
+
+    def test_works_without_pyarrow(self):
+        values = pd.Series([
+            '2022-07-05T18:19:30+0300', '2020-06-01T15:00:00-0500', '2021-03-01T10:00:00+03:00', 'broken', None,
+        ], dtype=object)
+        expected = parse_published_at(values)
+        with mock.patch.dict('sys.modules', {'pyarrow': None}):
+            actual = parse_published_at(values)
+        for a, b in zip(actual, expected):
+            pd.testing.assert_series_equal(a, b)
+
+    def test_matches_generic_parser(self):
+        rng = np.random.default_rng(0)
+        seconds = rng.integers(1.2e9, 1.8e9, 1000)
+        offsets = rng.choice(['+0300', '-0500', '+0000', '+0530'], 1000)
+        values = pd.Series([
+            pd.Timestamp(s, unit='s').strftime('%Y-%m-%dT%H:%M:%S') + o for s, o in zip(seconds, offsets)
+        ], dtype='str')
+        expected = pd.to_datetime(values, format='%Y-%m-%dT%H:%M:%S%z', utc=True)
+        pd.testing.assert_series_equal(parse_published_at(values)[0], expected.astype('datetime64[s, UTC]'))
+
+
+class HistoricalCurrencyRatesTest(TestCase):
+    """Конвертация по курсу месяца публикации"""
+
+    def setUp(self):
+        handle, self.rates_path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w') as f:
+            f.write('date,USD,EUR\n2019-01,65,75\n2019-03,,77\n2021-02,74,90\n')
+        self.addCleanup(os.remove, self.rates_path)
+
+    def test_lookup_by_publication_month(self):
+        rates = load_currency_rates(self.rates_path)
+        dates = pd.to_datetime(pd.Series([
+            '2019-01-10', '2019-02-10', '2019-03-10', '2010-01-01', '2024-01-01', None, '2019-01-10'
+        ]))
+        currencies = pd.Series(['USD', 'USD', 'EUR', 'USD', 'EUR', 'USD', 'GEL'])
+        np.testing.assert_allclose(
+            rates.lookup(currencies, dates),
+            [65, 65, 77, 65, 90, np.nan, np.nan]
+        )
+        np.testing.assert_array_equal(rates.lookup(pd.Series(['RUR']), dates[:1]), [1])
+
+    def test_repeated_loads_use_cache(self):
+        rates = load_currency_rates(self.rates_path)
+        self.assertIsInstance(rates, HistoricalCurrencyRates)
+        self.assertIs(load_currency_rates(self.rates_path), rates)
+
+    def test_processor_uses_rate_source(self):
+        csv_path = write_vacancies_csv(VACANCY_ROWS)
+        self.addCleanup(os.remove, csv_path)
+        processor = DataProcessor(csv_path, currency_rates=load_currency_rates(self.rates_path))
+        usd = processor.df[processor.df['salary_currency'] == 'USD']
+        self.assertEqual(usd['salary_rub'].tolist(), [3000 * 65])
+
+
+class ParsedFrameCacheTest(TestCase):
+    """Кэш разобранного CSV в Parquet"""
+
+    def setUp(self):
+        self.csv_path = write_vacancies_csv(VACANCY_ROWS)
+        self.addCleanup(os.remove, self.csv_path)
+        for path in cache_paths(self.csv_path):
+            self.addCleanup(lambda p=path: os.path.exists(p) and os.remove(p))
+
+    def test_cached_frame_matches_parsed_frame(self):
+        expected = DataProcessor(self.csv_path, use_cache=True)
+        data_path, _ = cache_paths(self.csv_path)
+        self.assertTrue(os.path.exists(data_path))
+
+        cached = DataProcessor(self.csv_path, use_cache=True)
+        self.assertEqual(cached.df['area_name'].dtype, 'category')
+        pd.testing.assert_frame_equal(cached.df, expected.df)
+        for a, b in zip(cached.process_salary_statistics(), expected.process_salary_statistics()):
+            pd.testing.assert_series_equal(a, b)
+
+    def test_changed_source_invalidates_cache(self):
+        DataProcessor(self.csv_path, use_cache=True)
+        with open(self.csv_path, 'a', encoding='utf-8', newline='') as f:
+            csv.writer(f).writerow(VACANCY_ROWS[0])
+        self.assertEqual(len(DataProcessor(self.csv_path, use_cache=True).df), len(VACANCY_ROWS) - 2)
+
+    def test_touched_source_reuses_cache_by_digest(self):
+        DataProcessor(self.csv_path, use_cache=True)
+        data_path, _ = cache_paths(self.csv_path)
+        cache_mtime = os.stat(data_path).st_mtime_ns
+        os.utime(self.csv_path, ns=(0, 0))
+        DataProcessor(self.csv_path, use_cache=True)
+        self.assertEqual(os.stat(data_path).st_mtime_ns, cache_mtime)
+
+    def test_unwritable_directory_skips_cache(self):
+        with mock.patch.object(pd.DataFrame, 'to_parquet', side_effect=PermissionError):
+            processor = DataProcessor(self.csv_path, use_cache=True)
+        pd.testing.assert_frame_equal(processor.df, DataProcessor(self.csv_path).df)
+        for path in cache_paths(self.csv_path):
+            self.assertFalse(os.path.exists(path))
+            self.assertFalse(os.path.exists(f'{path}.tmp'))
+
+    def test_known_digest_is_not_recomputed(self):
+        digest = file_digest(self.csv_path)
+        with mock.patch('main.frame_cache.file_digest') as recompute:
+            DataProcessor(self.csv_path, use_cache=True, digest=digest)
+            os.utime(self.csv_path, ns=(0, 0))
+            DataProcessor(self.csv_path, use_cache=True, digest=digest)
+        recompute.assert_not_called()
+
+
+class SkillCountsTest(TestCase):
+    """Частоты навыков из одного прохода по данным"""
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'year': [2019.0, 2019.0, 2020.0, np.nan, 2020.0],
+            'key_skills': ['PHP\nGit', 'Git\nSQL', None, 'PHP', 'SQL\nPHP\nSQL'],
+        })
+
+    def test_counts_match_value_counts(self):
+        all_counts, subset = SkillCounts.from_frame(self.df, [np.array([True, False, False, True, True])])
+        for year in (2019.0, 2020.0):
+            year_skills = self.df.loc[self.df['year'] == year, 'key_skills'].dropna()
+            expected = year_skills.str.split('\n').explode().value_counts()
+            self.assertEqual(dict(all_counts.top_by_year()[year]), dict(expected))
+        self.assertEqual(list(all_counts.top_overall().items()), [('SQL', 3), ('PHP', 2), ('Git', 2)])
+        self.assertEqual(list(subset.top_overall(top=1).items()), [('PHP', 2)])
+
+    def test_merge_aligns_vocabularies(self):
+        first, = SkillCounts.from_frame(self.df.iloc[:2])
+        second, = SkillCounts.from_frame(self.df.iloc[2:])
+        merged = SkillCounts.empty().merge(first).merge(second)
+        whole, = SkillCounts.from_frame(self.df)
+        self.assertEqual(list(merged.top_overall().items()), list(whole.top_overall().items()))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ProcessDataCommandTest(TestCase):
+    """Полный прогон process_data на небольшом CSV"""
+
+    def setUp(self):
+        self.csv_path = write_vacancies_csv(VACANCY_ROWS)
+        self.addCleanup(os.remove, self.csv_path)
+
+    def test_saves_statistics_skills_and_graphs(self):
+        call_command('process_data', self.csv_path, '--no-cache', stdout=io.StringIO())
+        self.assertEqual(SalaryStatistics.objects.active().filter(is_general=True).count(), 3)
+        self.assertEqual(GeographyData.objects.filter(is_general=False, year=None).count(), 3)
+        self.assertEqual(
+            list(GeographyData.objects.filter(is_general=False, year=2021).values_list('city', 'vacancy_share')),
+            [('Санкт-Петербург', Decimal('50.00')), ('Москва', Decimal('50.00'))],
+        )
+        self.assertEqual(Skill.objects.get(is_general=False, name='PHP').count, 5)
+        self.assertEqual(Graph.objects.count(), 12)
+
+    def test_reports_vacancies_without_rate(self):
+        out = io.StringIO()
+        call_command('process_data', self.csv_path, '--no-cache', '--no-graphs', stdout=out)
+        self.assertIn('Skipped 1 vacancies with no currency rate (XXX: 1)', out.getvalue())
+        # В потоковом режиме счётчики складываются по частям
+        self.assertEqual(DataProcessor(self.csv_path, chunksize=5).missing_rates, {'XXX': 1})
+
+    def test_failed_write_keeps_previous_dataset(self):
+        call_command('process_data', self.csv_path, '--no-cache', stdout=io.StringIO())
+        with mock.patch.object(Graph.objects, 'bulk_create', side_effect=RuntimeError('disk full')):
+            with self.assertRaises(RuntimeError):
+                call_command('process_data', self.csv_path, '--no-cache', stdout=io.StringIO())
+        self.assertEqual(Dataset.objects.count(), 1)
+        self.assertEqual(SalaryStatistics.objects.active().count(), 6)
+        self.assertEqual(Graph.objects.active().count(), 12)
+
+    def test_snapshots_are_swapped_and_pruned(self):
+        for _ in range(3):
+            call_command('process_data', self.csv_path, '--no-cache', '--keep', '2',
+                         stdout=io.StringIO())
+        old, new = Dataset.objects.order_by('id')
+        self.assertTrue(new.is_active)
+        self.assertFalse(old.is_active)
+        self.assertEqual(SalaryStatistics.objects.count(), 12)
+        self.assertEqual(SalaryStatistics.objects.active().count(), 6)
+
+        call_command('activate_dataset', str(old.pk), stdout=io.StringIO())
+        self.assertEqual(Dataset.objects.get(is_active=True), old)
+        self.assertTrue(SalaryStatistics.objects.active().filter(dataset=old).exists())
+
+
+class IncrementalImportTest(TestCase):
+    """Дозагрузка файлов в активный набор данных (--append)"""
+
+    def setUp(self):
+        self.paths = [write_vacancies_csv(rows) for rows in (VACANCY_ROWS, VACANCY_ROWS[:7], VACANCY_ROWS[7:])]
+        for path in self.paths:
+            self.addCleanup(os.remove, path)
+
+    def process(self, csv_path, *args):
+        call_command('process_data', csv_path, '--no-cache', '--no-graphs', *args, stdout=io.StringIO())
+
+    def snapshot(self):
+        return (
+            list(SalaryStatistics.objects.active().order_by('year', 'is_general')
+                 .values_list('year', 'is_general', 'average_salary', 'vacancy_count',
+                              'salary_count', 'salary_sketch')),
+            list(GeographyData.objects.active().order_by('year', 'city', 'is_general')
+                 .values_list('year', 'city', 'is_general', 'average_salary', 'vacancy_share',
+                              'salary_count', 'salary_sketch')),
+            list(Skill.objects.active().order_by('is_general', '-count', 'name')
+                 .values_list('is_general', 'name', 'count')),
+            list(ProfessionStatistics.objects.active().order_by('year')
+                 .values_list('year', 'average_salary', 'vacancy_count')),
+        )
+
+    def test_append_matches_full_import(self):
+        whole, first, delta = self.paths
+        self.process(whole)
+        expected = self.snapshot()
+
+        self.process(first)
+        self.process(delta, '--append', '--chunksize', '2')
+        self.assertEqual(self.snapshot(), expected)
+        self.assertEqual(IngestedFile.objects.active().count(), 2)
+
+    def test_replayed_file_is_skipped(self):
+        whole, first, delta = self.paths
+        self.process(first)
+        self.process(delta, '--append')
+        expected = self.snapshot()
+        dataset = Dataset.objects.get(is_active=True)
+
+        self.process(delta, '--append')
+        self.process(first, '--append')
+        self.assertEqual(Dataset.objects.get(is_active=True), dataset)
+        self.assertEqual(self.snapshot(), expected)
+
+    def test_append_needs_full_import(self):
+        out = io.StringIO()
+        call_command('process_data', self.paths[2], '--no-cache', '--append', stdout=out)
+        self.assertIn('run a full import first', out.getvalue())
+        self.assertFalse(Dataset.objects.exists())
+
+
+    def test_append_needs_same_registry(self):
+        whole, first, delta = self.paths
+        self.process(first)
+        dataset = Dataset.objects.get(is_active=True)
+        Profession.objects.create(slug='python', name='Python-разработчик', keywords='python')
+
+        out = io.StringIO()
+        call_command('process_data', delta, '--no-cache', '--append', stdout=out)
+        self.assertIn('Profession registry changed', out.getvalue())
+        self.assertEqual(Dataset.objects.get(is_active=True), dataset)
+
+        # Порядок и регистр ключевых слов на хэш реестра не влияют
+        Profession.objects.filter(slug='python').update(is_active=False)
+        Profession.objects.filter(slug='php').update(keywords='РНР\nPHP\nпхп')
+        self.process(delta, '--append')
+        self.assertEqual(IngestedFile.objects.active().count(), 2)
+
+class SalaryDistributionTest(TestCase):
+    """Суммы и скетч квантилей зарплат в строках статистики"""
+
+    def test_sketch_quantiles_and_merge(self):
+        values = np.random.default_rng(1).lognormal(11, 0.6, 10000)
+        sketch = QuantileSketch.from_values(values)
+        for q in (0.25, 0.5, 0.9):
+            expected = np.quantile(values, q, method='lower')
+            self.assertAlmostEqual(sketch.quantile(q) / expected, 1, delta=0.01)
+        parts = QuantileSketch.from_values(values[:3000]).merge(QuantileSketch.from_values(values[3000:]))
+        self.assertEqual(parts.to_bytes(), sketch.to_bytes())
+        self.assertEqual(QuantileSketch.from_bytes(sketch.to_bytes()).to_bytes(), sketch.to_bytes())
+
+    def test_mean_stddev_and_median_from_sums(self):
+        csv_path = write_vacancies_csv(VACANCY_ROWS * 3)
+        self.addCleanup(os.remove, csv_path)
+        call_command('process_data', csv_path, '--no-cache', '--no-graphs', stdout=io.StringIO())
+        salaries = DataProcessor(csv_path).df.groupby('year')['salary_rub']
+
+        for stat in SalaryStatistics.objects.active().filter(is_general=True):
+            year_salaries = salaries.get_group(stat.year).astype('float64')
+            self.assertEqual(stat.salary_count, stat.vacancy_count)
+            self.assertAlmostEqual(stat.mean_salary, float(stat.average_salary), places=2)
+            self.assertAlmostEqual(stat.salary_stddev, year_salaries.std(), places=4)
+            self.assertAlmostEqual(
+                stat.median_salary / np.quantile(year_salaries, 0.5, method='lower'), 1, delta=0.01
+            )
+        self.assertTrue(GeographyData.objects.filter(year=None, salary_sketch__isnull=False).exists())
+        self.assertTrue(ProfessionStatistics.objects.filter(salary_count__gt=0).exists())
+
+
+class ChartRenderingTest(TestCase):
+    """Пакетная отрисовка графиков в файлы с хэшем в имени"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.charts = [
+            {'data': pd.Series([1, 3, 2], index=[2019, 2020, 2021]), 'title': 'Зарплаты',
+             'filename': 'salary.png', 'chart_type': 'line'},
+            {'data': pd.Series([5, 3], index=['PHP', 'Git']), 'title': 'Навыки',
+             'filename': 'skills.png', 'chart_type': 'bar'},
+        ]
+
+    def test_files_are_content_addressed(self):
+        salary, skills = render_charts(self.charts, self.directory, workers=2)
+        self.assertRegex(skills, r'^skills\.[0-9a-f]{12}\.png$')
+        self.assertTrue(os.path.exists(os.path.join(self.directory, skills)))
+        self.assertEqual(read_index(self.directory), {'salary.png': salary, 'skills.png': skills})
+
+        mtime = os.stat(os.path.join(self.directory, skills)).st_mtime_ns
+        self.assertEqual(render_charts(self.charts, self.directory), [salary, skills])
+        self.assertEqual(os.stat(os.path.join(self.directory, skills)).st_mtime_ns, mtime)
+
+    def test_changed_data_gets_new_file_and_old_one_is_evicted(self):
+        _, old_skills = render_charts(self.charts, self.directory)
+        self.charts[1]['data'] = pd.Series([5, 4], index=['PHP', 'Git'])
+        _, new_skills = render_charts(self.charts, self.directory)
+        self.assertNotEqual(old_skills, new_skills)
+
+        self.assertEqual(evict_charts(self.directory, keep=[f'graphs/{old_skills}']), [])
+        self.assertEqual(evict_charts(self.directory), [old_skills])
+        self.assertTrue(os.path.exists(os.path.join(self.directory, new_skills)))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class StatisticsApiTest(TestCase):
+    """JSON API статистики для графиков на клиенте"""
+
+    def setUp(self):
+        csv_path = write_vacancies_csv(VACANCY_ROWS)
+        self.addCleanup(os.remove, csv_path)
+        call_command('process_data', csv_path, '--no-cache', '--no-graphs', stdout=io.StringIO())
+        cache.clear()
+
+    def test_returns_active_dataset_series(self):
+        response = self.client.get('/api/stats/php/count-by-year/')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['chart'], 'line')
+        self.assertEqual(data['labels'], [2019, 2020, 2021])
+        self.assertEqual(data['values'], [2, 1, 2])
+        self.assertEqual(Graph.objects.count(), 0)
+
+    def test_conditional_requests(self):
+        response = self.client.get('/api/stats/general/skills/')
+        self.assertIn('Last-Modified', response)
+        cached = self.client.get('/api/stats/general/skills/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_city_statistics_by_year(self):
+        data = self.client.get('/api/stats/general/city-share/?year=2019').json()
+        self.assertEqual(data['year'], 2019)
+        self.assertEqual(data['labels'], ['Москва', 'Санкт-Петербург'])
+        self.assertEqual(data['values'], [66.67, 33.33])
+
+        all_years = self.client.get('/api/stats/general/city-share/').json()
+        self.assertIsNone(all_years['year'])
+        self.assertIn('Алматы', all_years['labels'])
+
+    def test_profession_scope(self):
+        Profession.objects.create(slug='python', name='Python-разработчик', keywords='python\ndjango')
+        csv_path = write_vacancies_csv(VACANCY_ROWS)
+        self.addCleanup(os.remove, csv_path)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('process_data', csv_path, '--no-cache', '--no-graphs', stdout=io.StringIO())
+        self.assertEqual(ProfessionStatistics.objects.active().filter(profession__slug='php').count(), 3)
+
+        data = self.client.get('/api/stats/python/count-by-year/').json()
+        self.assertEqual(data['title'], 'Динамика количества вакансий по годам: Python-разработчик')
+        self.assertEqual((data['labels'], data['values']), ([2019], [1.0]))
+        self.assertEqual(self.client.get('/api/stats/python/skills/').status_code, 404)
+        self.assertEqual(self.client.get('/api/stats/golang/count-by-year/').status_code, 404)
+
+    def test_salary_quantiles(self):
+        data = self.client.get('/api/stats/php/salary-quantiles-by-year/').json()
+        self.assertEqual(data['labels'], [2019, 2020, 2021])
+        self.assertEqual([series['name'] for series in data['series']], ['25%', 'Медиана', '75%', '90%'])
+        self.assertEqual(data['values'], data['series'][1]['values'])
+        for quantiles in zip(*(series['values'] for series in data['series'])):
+            self.assertEqual(list(quantiles), sorted(quantiles))
+        # Единственная зарплата 2020 года: все квантили равны ей с точностью скетча
+        stat = SalaryStatistics.objects.active().get(year=2020, is_general=False)
+        for value in (stat.salary_p25, stat.salary_p50, stat.salary_p90):
+            self.assertAlmostEqual(value / float(stat.average_salary), 1, delta=0.01)
+
+    def test_unknown_statistic(self):
+        self.assertEqual(self.client.get('/api/stats/php/unknown/').status_code, 404)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class StatisticsPagesTest(TestCase):
+    """Страницы статистики читают данные один раз на версию набора"""
+
+    def setUp(self):
+        cache.clear()
+        self.csv_path = write_vacancies_csv(VACANCY_ROWS)
+        self.addCleanup(os.remove, self.csv_path)
+        self.process(self.csv_path)
+
+    def process(self, csv_path):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('process_data', csv_path, '--no-cache', '--no-graphs', stdout=io.StringIO())
+
+    def test_pages_render(self):
+        for url in ('/general-statistics/', '/demand/', '/geography/', '/skills/'):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_repeated_requests_hit_cache(self):
+        with self.assertNumQueries(6):
+            first = self.client.get('/general-statistics/')
+        with self.assertNumQueries(0):
+            second = self.client.get('/general-statistics/')
+        self.assertEqual(first.content, second.content)
+        with self.assertNumQueries(0):
+            self.client.get('/demand/')
+
+    def test_geography_year_filter(self):
+        response = self.client.get('/geography/?year=2019')
+        self.assertContains(response, 'Москва')
+        self.assertNotContains(response, 'Санкт-Петербург')
+        self.assertContains(response, 'city-share/?year=2019')
+        self.assertContains(self.client.get('/geography/'), 'Санкт-Петербург')
+        # Нецифровой год - сводка за все годы, а не ошибка
+        for year in ['²', '٣', 'abc', '-1', '0', '2030']:
+            self.assertContains(self.client.get(f'/geography/?year={year}'), 'Санкт-Петербург')
+
+    def test_zero_quantile_is_shown(self):
+        SalaryStatistics.objects.active().filter(is_general=False).update(salary_p25=0)
+        cache.clear()
+        self.assertContains(self.client.get('/demand/'), '<td>0 ₽</td>', count=3)
+
+    def test_page_cache_ignores_other_parameters(self):
+        self.client.get('/geography/')
+        with self.assertNumQueries(0):
+            for query in ('?utm=1', '?year=2030', '?year=abc&page=2'):
+                self.assertContains(self.client.get(f'/geography/{query}'), 'Санкт-Петербург')
+        self.client.get('/geography/?year=2019&utm=1')
+        with self.assertNumQueries(0):
+            self.assertNotContains(self.client.get('/geography/?utm=2&year=2019'), 'Санкт-Петербург')
+
+    def test_new_dataset_invalidates_pages(self):
+        self.assertContains(self.client.get('/geography/'), 'Алматы')
+        smaller_csv = write_vacancies_csv(VACANCY_ROWS[:4])
+        self.addCleanup(os.remove, smaller_csv)
+        self.process(smaller_csv)
+        self.assertNotContains(self.client.get('/geography/'), 'Алматы')
+
+
+class HHClientTest(TestCase):
+
+    def setUp(self):
+        self.stub = StubHHServer(count=8, delay=0.2, broken={'3'})
+        self.addCleanup(self.stub.close)
+        self.client_api = HHClient(base_url=self.stub.url, timeout=5, max_concurrency=8)
+        self.addCleanup(self.client_api.session.close)
+
+    def test_details_are_fetched_concurrently(self):
+        start = time.perf_counter()
+        vacancies = self.client_api.latest_vacancies()
+        elapsed = time.perf_counter() - start
+
+        # Последовательно 7 деталей с задержкой 0.2 с заняли бы 1.4 с
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual([v['title'] for v in vacancies], [f'PHP разработчик {i}' for i in range(8)])
+        self.assertEqual(vacancies[0]['skills'], 'PHP, Skill 0')
+        self.assertEqual(vacancies[0]['salary_from'], 100000)
+        self.assertIsNone(vacancies[1]['salary_currency'])
+
+    def test_failed_detail_keeps_vacancy(self):
+        vacancies = self.client_api.latest_vacancies()
+        self.assertEqual(vacancies[3]['skills'], '')
+        self.assertNotIn('description', vacancies[3])
+
+    def test_session_reuses_connections(self):
+        self.client_api.latest_vacancies()
+        self.client_api.latest_vacancies()
+        # 18 запросов, но соединений не больше размера пула
+        self.assertEqual(len(self.stub.requests), 18)
+        self.assertLessEqual(self.stub.connections, 8)
+
+    def test_timeout_per_request(self):
+        slow = HHClient(base_url=self.stub.url, timeout=0.05, max_concurrency=4)
+        self.addCleanup(slow.session.close)
+        self.assertIsNone(slow.vacancy_detail('1'))
+
+
+
+class AsyncHHClientTest(TestCase):
+
+    def setUp(self):
+        self.stub = StubHHServer(count=8, delay=0.2, broken={'3'})
+        self.addCleanup(self.stub.close)
+
+    async def test_details_are_fetched_concurrently(self):
+        hh = AsyncHHClient(base_url=self.stub.url, timeout=5, max_concurrency=8)
+        start = time.perf_counter()
+        vacancies = await hh.latest_vacancies()
+        elapsed = time.perf_counter() - start
+        await hh.aclose()
+
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual([v['title'] for v in vacancies], [f'PHP разработчик {i}' for i in range(8)])
+        self.assertEqual(vacancies[5]['skills'], 'PHP, Skill 5')
+        self.assertEqual(vacancies[3]['skills'], '')
+
+    async def test_concurrency_is_bounded(self):
+        hh = AsyncHHClient(base_url=self.stub.url, timeout=5, max_concurrency=2)
+        await hh.latest_vacancies()
+        await hh.aclose()
+        self.assertLessEqual(self.stub.max_active, 2)
+
+    async def test_concurrency_is_bounded_across_calls(self):
+        # Предел общий для клиента, а не для одного вызова
+        hh = AsyncHHClient(base_url=self.stub.url, timeout=5, max_concurrency=3)
+        await asyncio.gather(*(hh.vacancy_detail(str(i)) for i in range(6)))
+        await hh.aclose()
+        self.assertLessEqual(self.stub.max_active, 3)
+
+    async def test_many_slow_requests_in_one_loop(self):
+        # Пять одновременных обновлений по 7 медленных деталей в одном цикле событий:
+        # последовательно это заняло бы 7 с
+        hh = AsyncHHClient(base_url=self.stub.url, timeout=5, max_concurrency=20)
+        start = time.perf_counter()
+        results = await asyncio.gather(*(hh.latest_vacancies() for _ in range(5)))
+        elapsed = time.perf_counter() - start
+        await hh.aclose()
+        self.assertEqual([len(result) for result in results], [8] * 5)
+        self.assertLess(elapsed, 2.0)
+
+    async def test_timeout_per_request(self):
+        hh = AsyncHHClient(base_url=self.stub.url, timeout=0.05, max_concurrency=4)
+        self.assertIsNone(await hh.vacancy_detail('1'))
+        await hh.aclose()
+
+class LatestVacanciesFeedTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.stub = StubHHServer(count=4, delay=0)
+        self.addCleanup(self.stub.close)
+        self.hh = HHClient(base_url=self.stub.url, timeout=5, max_concurrency=4)
+        self.addCleanup(self.hh.session.close)
+        patcher = mock.patch('main.vacancies.get_client', return_value=self.hh)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_command_stores_feed(self):
+        out = io.StringIO()
+        call_command('refresh_vacancies', stdout=out)
+        self.assertIn('Saved 4 vacancies', out.getvalue())
+        self.assertEqual(LastVacancy.objects.count(), 4)
+        self.assertEqual(LastVacancy.objects.get(title='PHP разработчик 0').salary_currency, 'RUR')
+
+        # Повторное обновление заменяет ленту, а не дописывает её
+        call_command('refresh_vacancies', stdout=io.StringIO())
+        self.assertEqual(LastVacancy.objects.count(), 4)
+
+    def test_loop_survives_unexpected_errors(self):
+        out = io.StringIO()
+        # Второй сон прерывает бесконечный цикл
+        with mock.patch('main.management.commands.refresh_vacancies.refresh_feed_locked',
+                        side_effect=[KeyError('items'), 4]), \
+                mock.patch('main.management.commands.refresh_vacancies.time.sleep',
+                           side_effect=[None, KeyboardInterrupt]), \
+                self.assertLogs('main.management.commands.refresh_vacancies', 'ERROR') as logs:
+            with self.assertRaises(KeyboardInterrupt):
+                call_command('refresh_vacancies', '--loop', stdout=out)
+        self.assertIn("KeyError: 'items'", logs.output[0])
+        self.assertIn('Saved 4 vacancies', out.getvalue())
+
+    def test_view_does_not_call_api(self):
+        refresh_feed()
+        requests_before = len(self.stub.requests)
+        with mock.patch('main.vacancies.astart_revalidation') as revalidate:
+            response = self.client.get('/latest-vacancies/')
+        self.assertContains(response, 'Компания 3')
+        self.assertContains(response, 'Skill 2')
+        revalidate.assert_not_called()
+        self.assertEqual(len(self.stub.requests), requests_before)
+
+    def test_feed_is_read_from_db_when_cache_is_empty(self):
+        refresh_feed()
+        cache.clear()
+        with mock.patch('main.vacancies.astart_revalidation') as revalidate:
+            self.assertEqual(len(async_to_sync(alatest_feed)()), 4)
+        revalidate.assert_not_called()
+
+    def test_stale_feed_is_served_and_revalidated(self):
+        refresh_feed()
+        LastVacancy.objects.update(fetched_at=timezone.now() - timedelta(hours=1))
+        cache.clear()
+        with mock.patch('main.vacancies.astart_revalidation') as revalidate:
+            vacancies = async_to_sync(alatest_feed)()
+        self.assertEqual(len(vacancies), 4)
+        revalidate.assert_called_once()
+
+    async def test_async_refresh_and_view(self):
+        hh = AsyncHHClient(base_url=self.stub.url, timeout=5, max_concurrency=4)
+        self.assertEqual(await arefresh_feed_locked(hh), 4)
+        await hh.aclose()
+        self.assertEqual(await LastVacancy.objects.acount(), 4)
+        self.assertIsNotNone(await cache.aget(FEED_KEY))
+
+        with mock.patch('main.vacancies.astart_revalidation') as revalidate:
+            response = await self.async_client.get('/latest-vacancies/')
+        self.assertContains(response, 'Компания 1')
+        revalidate.assert_not_called()
+
+    def test_refresh_is_single_flight(self):
+        cache.add(FEED_LOCK_KEY, True)
+        self.assertIsNone(refresh_feed_locked())
+        self.assertEqual(self.stub.requests, [])
+        cache.delete(FEED_LOCK_KEY)
+        self.assertEqual(refresh_feed_locked(), 4)
+        self.assertIsNone(cache.get(FEED_LOCK_KEY))
+
+
+class StaleFeedRevalidationTest(TransactionTestCase):
+    """
+    Фоновое обновление ленты без заглушки astart_revalidation: поток пишет
+    в БД своим соединением, поэтому тест без общей транзакции
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.stub = StubHHServer(count=4, delay=0)
+        self.addCleanup(self.stub.close)
+        # Клиент создаёт пул httpx в цикле фоновых обновлений при первом запросе
+        self.hh = AsyncHHClient(base_url=self.stub.url, timeout=5, max_concurrency=4)
+        patcher = mock.patch('main.vacancies.get_async_client', return_value=self.hh)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        vacancies._revalidation = None
+
+    @staticmethod
+    def wait_for_revalidation():
+        if vacancies._revalidation is not None:
+            vacancies._revalidation.result(10)
+
+    def test_stale_feed_is_refreshed_under_wsgi(self):
+        refresh_feed(HHClient(base_url=self.stub.url, timeout=5))
+        stale = timezone.now() - timedelta(hours=1)
+        LastVacancy.objects.update(fetched_at=stale)
+        cache.clear()
+        requests_before = len(self.stub.requests)
+
+        # Тестовый клиент Django - WSGI: асинхронное представление идёт через async_to_sync
+        response = self.client.get('/latest-vacancies/')
+        self.assertEqual(response.status_code, 200)
+        self.wait_for_revalidation()
+
+        self.assertGreater(len(self.stub.requests), requests_before)
+        self.assertTrue(all(vacancy.fetched_at > stale for vacancy in LastVacancy.objects.all()))
+        # Новое соединение без L1 процесса видит то, что записал поток
+        self.assertGreater(caches.create_connection('default').get(FEED_KEY)[0], stale)
+
+    def test_refresh_errors_are_logged(self):
+        LastVacancy.objects.create(
+            title='PHP', company='Компания', region='Москва',
+            published_at=timezone.now(), fetched_at=timezone.now() - timedelta(hours=1),
+        )
+        self.hh.base_url = 'http://127.0.0.1:1'
+        with self.assertLogs('main.vacancies', 'ERROR'):
+            self.client.get('/latest-vacancies/')
+            self.wait_for_revalidation()
+        self.assertEqual(LastVacancy.objects.count(), 1)
+
+
+class StatisticsIndexesTest(TestCase):
+
+    def setUp(self):
+        csv_path = write_vacancies_csv(VACANCY_ROWS)
+        self.addCleanup(os.remove, csv_path)
+        call_command('process_data', csv_path, '--no-cache', '--no-graphs', stdout=io.StringIO())
+        self.dataset = Dataset.objects.get(is_active=True)
+
+    def assertUsesIndex(self, queryset, index=None):
+        plan = queryset.explain()
+        self.assertIn('USING', plan)
+        self.assertNotIn('SCAN', plan)
+        if index:
+            self.assertIn(index, plan)
+        # Сортировка берётся из индекса, без временного B-дерева
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_page_queries_use_indexes(self):
+        dataset_id = self.dataset.pk
+        # Индекс уникального ограничения SQLite называет sqlite_autoindex_*
+        self.assertUsesIndex(
+            SalaryStatistics.objects.filter(dataset_id=dataset_id).order_by('year'),
+        )
+        self.assertUsesIndex(
+            GeographyData.objects.filter(dataset_id=dataset_id, year=None).order_by('is_general', '-average_salary'),
+            'geography_salary_idx',
+        )
+        self.assertUsesIndex(
+            GeographyData.objects.filter(dataset_id=dataset_id, year=2020).order_by('is_general', '-average_salary'),
+            'geography_salary_idx',
+        )
+        self.assertUsesIndex(
+            Skill.objects.filter(dataset_id=dataset_id).order_by('is_general', '-count'),
+            'skill_top_idx',
+        )
+        self.assertUsesIndex(
+            Graph.objects.filter(dataset_id=dataset_id),
+            'graph_type_idx',
+        )
+
+    def test_duplicate_rows_are_rejected(self):
+        stat = SalaryStatistics.objects.filter(dataset=self.dataset).first()
+        with self.assertRaises(IntegrityError):
+            SalaryStatistics.objects.create(
+                dataset=self.dataset, year=stat.year, is_general=stat.is_general,
+                average_salary=1, vacancy_count=1,
+            )
+
+
+class SQLiteCacheTest(TestCase):
+
+    def make_cache(self, **options):
+        return SQLiteCache(self.path, {'OPTIONS': options})
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = os.path.join(directory, 'cache.sqlite3')
+
+    def test_suite_does_not_use_site_cache(self):
+        default = caches['default']
+        if not isinstance(default, SQLiteCache):
+            self.skipTest('CACHE_BACKEND=locmem')
+        self.assertIn('ulearnsite-test-cache-', default.path)
+
+    def test_shared_between_instances(self):
+        first, second = self.make_cache(), self.make_cache()
+        first.set('key', {'value': 1})
+        self.assertEqual(second.get('key'), {'value': 1})
+        self.assertTrue(second.add('lock', 1))
+        self.assertFalse(first.add('lock', 2))
+        second.delete('lock')
+        self.assertTrue(first.add('lock', 3))
+
+    def test_lru_eviction(self):
+        cache_ = self.make_cache(MAX_ENTRIES=3, L1_ENTRIES=0, ACCESS_RESOLUTION=0)
+        for key in 'abc':
+            cache_.set(key, key)
+            time.sleep(0.01)
+        cache_.get('a')
+        cache_.set('d', 'd')
+        self.assertIsNone(cache_.get('b'))
+        self.assertEqual([cache_.get(key) for key in 'acd'], ['a', 'c', 'd'])
+
+    def test_reads_do_not_write(self):
+        writer, reader = self.make_cache(), self.make_cache(L1_ENTRIES=0)
+        writer.set('key', 1)
+        changes = reader._db.total_changes
+        for _ in range(3):
+            self.assertEqual(reader.get('key'), 1)
+        self.assertEqual(reader._db.total_changes, changes)
+
+    def test_l1_hits_refresh_lru(self):
+        cache_ = self.make_cache(MAX_ENTRIES=3, ACCESS_RESOLUTION=0.05)
+        for key in 'abc':
+            cache_.set(key, key)
+            time.sleep(0.01)
+        time.sleep(0.1)
+        # Попадание в L1 записывает устаревшее время чтения в файл
+        self.assertEqual(cache_.get('a'), 'a')
+        cache_.set('d', 'd')
+        self.assertEqual(self.make_cache(L1_ENTRIES=0).get('b'), None)
+        self.assertEqual(self.make_cache(L1_ENTRIES=0).get('a'), 'a')
+
+    def test_stats_follow_writes(self):
+        cache_ = self.make_cache(L1_ENTRIES=0)
+        for i in range(5):
+            cache_.set(f'key{i}', b'x' * 100 * i)
+        cache_.set('key1', b'y' * 1000)
+        cache_.delete('key2')
+        cache_.add('key3', 1)
+        cache_.touch('key4')
+        db = cache_._db
+        expected = db.execute('SELECT COUNT(*), SUM(size) FROM cache').fetchone()
+        self.assertEqual(db.execute('SELECT count, size FROM cache_stats').fetchone(), expected)
+        cache_.clear()
+        self.assertEqual(db.execute('SELECT count, size FROM cache_stats').fetchone(), (0, 0))
+
+    def test_size_bound(self):
+        cache_ = self.make_cache(MAX_BYTES=3000, L1_ENTRIES=0)
+        for i in range(5):
+            cache_.set(f'key{i}', b'x' * 1000)
+            time.sleep(0.01)
+        self.assertIsNone(cache_.get('key0'))
+        self.assertIsNotNone(cache_.get('key4'))
+
+    def test_expiry(self):
+        cache_ = self.make_cache()
+        cache_.set('key', 1, timeout=0.05)
+        self.assertTrue(cache_.has_key('key'))
+        time.sleep(0.1)
+        self.assertIsNone(cache_.get('key'))
+        self.assertTrue(cache_.add('key', 2))
+
+    def test_l1_is_short_lived(self):
+        writer, reader = self.make_cache(), self.make_cache(L1_TIMEOUT=0.05)
+        writer.set('key', 1)
+        self.assertEqual(reader.get('key'), 1)
+        writer.set('key', 2)
+        # До истечения L1 читатель видит своё значение, затем общее
+        self.assertEqual(reader.get('key'), 1)
+        time.sleep(0.1)
+        self.assertEqual(reader.get('key'), 2)
+
+    def test_cached_objects_are_copies(self):
+        cache_ = self.make_cache()
+        cache_.set('key', [1])
+        cache_.get('key').append(2)
+        self.assertEqual(cache_.get('key'), [1])
@@ -8,5 +8,6 @@ urlpatterns = [
     path('geography/', views.geography, name='geography'),
     path('skills/', views.skills, name='skills'),
     path('latest-vacancies/', views.latest_vacancies, name='latest_vacancies'),
+    path('api/stats/<str:scope>/<str:statistic>/', views.statistics_api, name='statistics_api'),
 ]
 
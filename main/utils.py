@@ -1,19 +1,457 @@
 import pandas as pd
-import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
 import os
+import pickle
+import zlib
 from django.conf import settings
 import numpy as np
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .charts import render_chart, render_charts
+from .currency import StaticCurrencyRates
+from .dates import parse_published_at
+from .frame_cache import load_cached_frame, save_cached_frame
+from .professions import PRIMARY_PROFESSION, ProfessionMatcher, with_primary
+from .sketch import QUANTILES, QuantileSketch, bucket_ids
+from .skills import SkillCounts, SkillIds
+
+VACANCY_COLUMNS = [
+    'name', 'key_skills', 'salary_from', 'salary_to',
+    'salary_currency', 'area_name', 'published_at'
+]
+
+# Размер части CSV по умолчанию для параллельной обработки
+DEFAULT_CHUNKSIZE = 100000
+
+# Версия сохраняемых агрегатов: меняется вместе с полями StatisticsAccumulator
+AGGREGATES_VERSION = 2
+
+def convert_salary_to_rub(row, currency_rates):
+    """Конвертация зарплаты одной вакансии в рубли (построчная эталонная версия)"""
+    if pd.isna(row['salary_from']) and pd.isna(row['salary_to']):
+        return None
+
+    salary_from = row['salary_from'] if not pd.isna(row['salary_from']) else 0
+    salary_to = row['salary_to'] if not pd.isna(row['salary_to']) else salary_from
+
+    if salary_from == 0 and salary_to == 0:
+        return None
+
+    avg_salary = (salary_from + salary_to) / 2 if salary_to != 0 else salary_from
+    currency = row['salary_currency']
+
+    if pd.isna(currency) or currency not in currency_rates:
+        return None
+
+    return avg_salary * currency_rates[currency]
+
+
+def convert_salaries_to_rub(df, currency_rates):
+    """
+    Векторная конвертация зарплат в рубли, повторяет convert_salary_to_rub.
+    currency_rates - источник курсов из main.currency (статичный или помесячный).
+    """
+    raw_from = df['salary_from'].to_numpy(dtype='float64', na_value=np.nan)
+    raw_to = df['salary_to'].to_numpy(dtype='float64', na_value=np.nan)
+
+    salary_from = np.where(np.isnan(raw_from), 0.0, raw_from)
+    salary_to = np.where(np.isnan(raw_to), salary_from, raw_to)
+    avg_salary = np.where(salary_to != 0, (salary_from + salary_to) / 2, salary_from)
+
+    # Неизвестная или пустая валюта даёт NaN вместо курса
+    rates = currency_rates.lookup(df['salary_currency'], df['published_at'])
+
+    invalid = (
+        (np.isnan(raw_from) & np.isnan(raw_to))
+        | ((salary_from == 0) & (salary_to == 0))
+    )
+    return pd.Series(np.where(invalid, np.nan, avg_salary * rates), index=df.index)
+
+
+def missing_rate_counts(df, salary_rub):
+    """
+    Число вакансий с указанной зарплатой и валютой, для которой нет курса,
+    по кодам валют. Такие вакансии не попадают в статистику.
+    """
+    salary_from = df['salary_from'].to_numpy(dtype='float64', na_value=np.nan)
+    salary_to = df['salary_to'].to_numpy(dtype='float64', na_value=np.nan)
+    has_salary = (~np.isnan(salary_from) & (salary_from != 0)) | (~np.isnan(salary_to) & (salary_to != 0))
+    missing = has_salary & np.isnan(salary_rub.to_numpy(dtype='float64')) & df['salary_currency'].notna().to_numpy()
+    currencies = df['salary_currency'][missing].astype(str)
+    return {currency: int(count) for currency, count in currencies.value_counts().items()}
+
+
+def add_counts(total, part):
+    """Сложение словарей счётчиков (total меняется на месте)"""
+    for key, count in part.items():
+        total[key] = total.get(key, 0) + count
+    return total
+
+
+def with_float64_salary(df):
+    """
+    Кадр с зарплатами в float64 для агрегатов: суммы миллионов значений
+    во float32 теряют точность. Остальные столбцы не копируются.
+    """
+    if df['salary_rub'].dtype == 'float64':
+        return df
+    return df.assign(salary_rub=df['salary_rub'].astype('float64'))
+
+
+def year_city_table(salary, count, year_total):
+    """
+    Таблица (год, город): средняя зарплата, число вакансий и доля вакансий
+    города среди всех вакансий года; города меньше 1% в своём году отбрасываются.
+    """
+    city_stats = pd.DataFrame({'salary_rub': salary, 'name': count}).sort_index()
+    city_stats.index = pd.MultiIndex.from_arrays([
+        city_stats.index.get_level_values(0).astype('int64'),
+        city_stats.index.get_level_values(1).astype(str),
+    ], names=['year', 'area_name'])
+    totals = year_total.rename(index=int).reindex(city_stats.index.get_level_values('year')).to_numpy()
+    city_stats['vacancy_share'] = (city_stats['name'] / totals * 100).round(2)
+    return city_stats[city_stats['name'] >= totals * 0.01]
+
+
+def with_salary_columns(df):
+    """
+    Кадр со столбцами для сумм по группам: зарплата в float64, её квадрат
+    и номер корзины скетча квантилей
+    """
+    df = with_float64_salary(df)
+    salary = df['salary_rub'].to_numpy()
+    return df.assign(salary_sq=salary * salary, salary_bucket=bucket_ids(salary))
+
+
+def salary_sums(df, by):
+    """
+    Суммы для точного слияния по группам by: сумма, число и сумма квадратов
+    зарплат, число вакансий. Вторым значением - счётчики корзин скетча
+    квантилей по (by, корзина). df - кадр из with_salary_columns.
+    """
+    by = list(by)
+    sums = df.groupby(by, observed=True).agg(
+        salary_sum=('salary_rub', 'sum'),
+        salary_count=('salary_rub', 'count'),
+        salary_sumsq=('salary_sq', 'sum'),
+        vacancy_count=('salary_rub', 'size')
+    )
+    sketch = df.groupby(by + ['salary_bucket'], observed=True).size()
+    return sums, sketch
+
+
+def profession_year_sums(df, matcher):
+    """
+    Суммы (как у salary_sums) по (профессия, год) для всех профессий
+    реестра. Строки профессии выбираются по битовой маске столбца professions,
+    повторного поиска по названиям нет.
+    """
+    tags = df['professions'].to_numpy()
+    sums, sketches = {}, {}
+    for slug in matcher.slugs:
+        sums[slug], sketches[slug] = salary_sums(df[matcher.selects(tags, slug)], ['year'])
+    return (
+        pd.concat(sums, names=['profession', 'year']),
+        pd.concat(sketches, names=['profession', 'year', 'salary_bucket']),
+    )
+
+
+def profession_year_table(sums):
+    """Средняя зарплата и число вакансий по (профессия, год)"""
+    table = pd.DataFrame({
+        'salary_rub': (sums['salary_sum'] / sums['salary_count']).round(2),
+        'name': sums['vacancy_count'].astype('int64')
+    })
+    table.index = pd.MultiIndex.from_arrays([
+        table.index.get_level_values(0).astype(str),
+        table.index.get_level_values(1).astype('int64'),
+    ], names=['profession', 'year'])
+    return table.sort_index()
+
+
+def _plain_index(index):
+    """Индекс агрегатов с годами int64 и строковыми городами и профессиями"""
+    levels = [
+        index.get_level_values(i).astype('int64' if name == 'year' else str)
+        for i, name in enumerate(index.names)
+    ]
+    if len(levels) == 1:
+        return levels[0]
+    return pd.MultiIndex.from_arrays(levels, names=index.names)
+
+
+def _empty_index(names):
+    if len(names) == 1:
+        return pd.Index([], name=names[0])
+    return pd.MultiIndex.from_arrays([[] for _ in names], names=names)
+
+
+class StatisticsAccumulator:
+    """Накопитель агрегатов для потоковой обработки CSV по частям"""
+
+    # Уровни агрегатов: имя -> столбцы группировки
+    LEVELS = {
+        'year': ['year'],
+        'city': ['area_name'],
+        'year_city': ['year', 'area_name'],
+    }
+    # Суммы по (профессия, год) считаются, только если передан реестр профессий
+    PROFESSION_LEVEL = 'profession_year'
+
+    def __init__(self):
+        self.total = 0
+        # На каждом уровне: суммы для точного слияния и счётчики корзин скетча
+        self.sums = {}
+        self.sketches = {}
+        for level, by in [*self.LEVELS.items(), (self.PROFESSION_LEVEL, ['profession', 'year'])]:
+            self.sums[level] = pd.DataFrame(
+                columns=['salary_sum', 'salary_count', 'salary_sumsq', 'vacancy_count'],
+                dtype='float64', index=_empty_index(by)
+            )
+            self.sketches[level] = pd.Series(dtype='int64', index=_empty_index([*by, 'salary_bucket']))
+        self.skill_counts = SkillCounts.empty()
+
+    @staticmethod
+    def _add(total, part):
+        return total.add(part, fill_value=0)
+
+    def _add_level(self, level, sums, sketch):
+        self.sums[level] = self._add(self.sums[level], sums)
+        self.sketches[level] = self._add(self.sketches[level], sketch)
+
+    def merge(self, other):
+        """Слияние с агрегатами другой части данных"""
+        self.total += other.total
+        for level in self.sums:
+            self._add_level(level, other.sums[level], other.sketches[level])
+        self.skill_counts.merge(other.skill_counts)
+        return self
+
+    def update(self, df, skill_counts=None, matcher=None):
+        """
+        Добавление очередной порции вакансий к накопленным агрегатам.
+        skill_counts - уже посчитанные по этой порции частоты навыков,
+        matcher - реестр профессий для сумм по (профессия, год).
+        """
+        self.total += len(df)
+        df = with_salary_columns(df)
+
+        for level, by in self.LEVELS.items():
+            self._add_level(level, *salary_sums(df, by))
+        if matcher is not None:
+            self._add_level(self.PROFESSION_LEVEL, *profession_year_sums(df, matcher))
+
+        if skill_counts is None:
+            skill_counts, = SkillCounts.from_frame(df)
+        self.skill_counts.merge(skill_counts)
+
+    def _mean(self, level):
+        sums = self.sums[level]
+        return (sums['salary_sum'] / sums['salary_count']).round(2)
+
+    def salary_statistics(self):
+        """Средняя зарплата и количество вакансий по годам"""
+        salary = self._mean('year')
+        count = self.sums['year']['vacancy_count'].astype('int64')
+        return (
+            salary.rename(index=int).sort_index().rename('salary_rub').rename_axis('year'),
+            count.rename(index=int).sort_index().rename('name').rename_axis('year')
+        )
+
+    def geography_data(self):
+        """Статистика по городам в формате process_geography_data"""
+        city_stats = pd.DataFrame({
+            'salary_rub': self._mean('city'),
+            'name': self.sums['city']['vacancy_count'].astype('int64')
+        })
+        city_stats.index = city_stats.index.astype(str).rename('area_name')
+        city_stats = city_stats.sort_index()
+        city_stats['vacancy_share'] = (city_stats['name'] / self.total * 100).round(2)
+        return city_stats[city_stats['name'] >= self.total * 0.01]
+
+    def geography_by_year(self):
+        """Статистика по городам за каждый год в формате process_geography_by_year"""
+        return year_city_table(
+            self._mean('year_city'),
+            self.sums['year_city']['vacancy_count'].astype('int64'),
+            self.sums['year']['vacancy_count']
+        )
+
+    def profession_statistics(self):
+        """Статистика профессий в формате process_profession_statistics"""
+        return profession_year_table(self.sums[self.PROFESSION_LEVEL])
+
+    def skills_statistics(self, top=20):
+        """ТОП навыков по годам в формате process_skills"""
+        return self.skill_counts.top_by_year(top)
+
+    def distributions(self, level):
+        """
+        Суммы зарплат и скетч квантилей по группам уровня level (year, city,
+        year_city или profession_year): столбцы salary_sum, salary_count,
+        salary_sumsq, salary_sketch (байты QuantileSketch) и квантили
+        salary_p25 ... salary_p90 из sketch.QUANTILES
+        """
+        sums = self.sums[level]
+        table = pd.DataFrame({
+            'salary_sum': sums['salary_sum'].astype('float64'),
+            'salary_count': sums['salary_count'].astype('int64'),
+            'salary_sumsq': sums['salary_sumsq'].astype('float64'),
+        }, index=_plain_index(sums.index))
+
+        sketches = self.sketches[level]
+        keys = _plain_index(sketches.index.droplevel('salary_bucket'))
+        buckets = sketches.index.get_level_values('salary_bucket')
+        counts = sketches.to_numpy(dtype='int64')
+        # Строки одной группы подряд: стабильная сортировка по номеру группы
+        codes, uniques = pd.factorize(keys)
+        order = np.argsort(codes, kind='stable')
+        codes, buckets, counts = codes[order], buckets[order], counts[order]
+        bounds = np.flatnonzero(np.diff(codes)) + 1
+        sketches = {
+            uniques[codes[start]]: QuantileSketch(buckets[start:end], counts[start:end])
+            for start, end in zip(np.r_[0, bounds], np.r_[bounds, len(codes)])
+        }
+        empty = QuantileSketch()
+        group_sketches = [sketches.get(key, empty) for key in table.index]
+        table['salary_sketch'] = [sketch.to_bytes() for sketch in group_sketches]
+        quantiles = np.array(
+            [sketch.quantiles(list(QUANTILES.values())) for sketch in group_sketches], dtype='float64'
+        ).reshape(len(group_sketches), len(QUANTILES))
+        for i, name in enumerate(QUANTILES):
+            table[f'salary_{name}'] = quantiles[:, i]
+        return table.sort_index()
+
+
+def dump_aggregates(all_aggregates, php_aggregates):
+    """Агрегаты всех и PHP вакансий в байтах для DatasetState"""
+    return zlib.compress(pickle.dumps(
+        (AGGREGATES_VERSION, all_aggregates, php_aggregates), pickle.HIGHEST_PROTOCOL
+    ))
+
+
+def load_aggregates(data):
+    """Агрегаты из dump_aggregates; агрегаты другой версии не загружаются"""
+    version, all_aggregates, php_aggregates = pickle.loads(zlib.decompress(data))
+    if version != AGGREGATES_VERSION:
+        raise ValueError(f'Агрегаты версии {version} не поддерживаются, нужна полная загрузка')
+    return all_aggregates, php_aggregates
+
 
 class DataProcessor:
-    def __init__(self, csv_path):
-        self.df = pd.read_csv(
+    def __init__(self, csv_path, chunksize=None, currency_rates=None, use_cache=False, workers=1,
+                 professions=None, digest=None):
+        self.currency_rates = currency_rates or StaticCurrencyRates()
+        # professions - [(slug, ключевые слова)]; основная профессия (PHP) есть всегда
+        self.matcher = ProfessionMatcher(with_primary(professions))
+        self.chunksize = chunksize
+        self._skills = None
+        self._aggregates = None
+        # Вакансии, отброшенные из-за валюты без курса: код валюты -> число
+        self.missing_rates = {}
+
+        if chunksize or workers > 1:
+            # Потоковый режим: в памяти держим только агрегаты
+            self.df = None
+            self.php_df = None
+            self.all_aggregates = StatisticsAccumulator()
+            self.php_aggregates = StatisticsAccumulator()
+
+            chunks = self._read_csv(csv_path, chunksize=chunksize or DEFAULT_CHUNKSIZE)
+            if workers > 1:
+                parts = self._aggregate_parallel(chunks, workers)
+            else:
+                parts = (
+                    self._aggregate_chunk(chunk, self.currency_rates, self.matcher) for chunk in chunks
+                )
+            for all_part, php_part, missing_rates in parts:
+                self.all_aggregates.merge(all_part)
+                self.php_aggregates.merge(php_part)
+                add_counts(self.missing_rates, missing_rates)
+        else:
+            self.df, self.php_df, self.missing_rates = self._prepare_frame(
+                self._load_frame(csv_path, use_cache, digest), self.currency_rates, self.matcher
+            )
+            # Навыки хранятся массивами id, строки key_skills отбрасываются
+            self.skill_ids = SkillIds.from_series(self.df['key_skills'])
+            self.df = self.df.drop(columns='key_skills')
+            self.php_df = self.php_df.drop(columns='key_skills')
+
+    def memory_usage(self):
+        """
+        Объём данных вакансий в памяти, байт: кадры всех и PHP вакансий
+        и массивы навыков. В потоковом режиме в памяти только агрегаты, 0.
+        """
+        if self.df is None:
+            return 0
+        return int(
+            self.df.memory_usage(deep=True).sum()
+            + self.php_df.memory_usage(deep=True).sum()
+            + self.skill_ids.nbytes
+        )
+
+    def aggregates(self):
+        """
+        Полные агрегаты всех и PHP вакансий: в потоковом режиме накопленные,
+        в режиме в памяти - посчитанные по кадрам. Их можно сохранить
+        и сложить с агрегатами следующих файлов.
+        """
+        if self.df is None:
+            return self.all_aggregates, self.php_aggregates
+        if self._aggregates is None:
+            all_skills, php_skills = self._skill_counts()
+            all_aggregates, php_aggregates = StatisticsAccumulator(), StatisticsAccumulator()
+            all_aggregates.update(self.df, all_skills, self.matcher)
+            php_aggregates.update(self.php_df, php_skills)
+            self._aggregates = all_aggregates, php_aggregates
+        return self._aggregates
+
+    def extend(self, all_aggregates, php_aggregates):
+        """
+        Дозагрузка: агрегаты прежних данных дополняются агрегатами этого
+        файла, дальше статистика и графики строятся по их сумме
+        """
+        all_delta, php_delta = self.aggregates()
+        self.all_aggregates = all_aggregates.merge(all_delta)
+        self.php_aggregates = php_aggregates.merge(php_delta)
+        self.df = self.php_df = None
+
+    @staticmethod
+    def _aggregate_chunk(chunk, currency_rates, matcher):
+        """Частичные агрегаты одной части CSV (в том числе в дочернем процессе)"""
+        df, php_df, missing_rates = DataProcessor._prepare_frame(
+            DataProcessor._parse_frame(chunk), currency_rates, matcher
+        )
+        # Навыки разбираются один раз, PHP счётчики берутся по маске строк
+        all_skills, php_skills = SkillCounts.from_frame(df, [df.index.isin(php_df.index)])
+        all_part, php_part = StatisticsAccumulator(), StatisticsAccumulator()
+        all_part.update(df, all_skills, matcher)
+        php_part.update(php_df, php_skills)
+        return all_part, php_part, missing_rates
+
+    def _aggregate_parallel(self, chunks, workers):
+        """
+        Обработка частей CSV в пуле процессов. Чтение идёт в основном процессе,
+        в работе одновременно не больше 2 * workers частей, а результаты
+        отдаются в порядке чтения, чтобы слияние было детерминированным.
+        """
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(self._aggregate_chunk, chunk, self.currency_rates, self.matcher))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    @staticmethod
+    def _read_csv(csv_path, chunksize=None):
+        """Чтение CSV целиком или итератором по частям"""
+        return pd.read_csv(
             csv_path,
-            names=[
-                'name', 'key_skills', 'salary_from', 'salary_to',
-                'salary_currency', 'area_name', 'published_at'
-            ],
+            names=VACANCY_COLUMNS,
             dtype={
                 'name': str,
                 'key_skills': str,
@@ -22,77 +460,87 @@ class DataProcessor:
                 'published_at': str
             },
             na_values=[''],
-            low_memory=False
+            low_memory=False,
+            chunksize=chunksize
         )
 
-        # Обработка дат
-        self.df['published_at'] = pd.to_datetime(
-            self.df['published_at'].str.split('+').str[0],
-            format='%Y-%m-%dT%H:%M:%S',
-            errors='coerce'
-        )
-        self.df['year'] = self.df['published_at'].dt.year
+    def _load_frame(self, csv_path, use_cache, digest=None):
+        """
+        Чтение и разбор CSV целиком; с use_cache - через Parquet-кэш рядом с файлом.
+        digest - уже посчитанный хэш файла, чтобы не читать большой CSV ещё раз.
+        """
+        df = load_cached_frame(csv_path, digest) if use_cache else None
+        if df is None:
+            df = self._parse_frame(self._read_csv(csv_path))
+            # Повторяющиеся строки городов и валют хранятся как категории
+            df['area_name'] = df['area_name'].astype('category')
+            df['salary_currency'] = df['salary_currency'].astype('category')
+            if use_cache:
+                save_cached_frame(csv_path, df, digest)
+        return df
+
+    @staticmethod
+    def _parse_frame(df):
+        """Разбор дат и числовых столбцов"""
+        # Время публикации в UTC с учётом смещения; год - по местной дате
+        # публикации, без даты - пропуск; int16 вместо float64
+        df['published_at'], df['year'] = parse_published_at(df['published_at'])
 
         # Преобразование зарплат в числовой формат
-        self.df['salary_from'] = pd.to_numeric(self.df['salary_from'], errors='coerce')
-        self.df['salary_to'] = pd.to_numeric(self.df['salary_to'], errors='coerce')
-
-        # Создание маски для PHP вакансий
-        php_mask = self.df['name'].str.contains('php|пхп|рнр', case=False, na=False)
-        self.php_df = self.df[php_mask].copy()
+        df['salary_from'] = pd.to_numeric(df['salary_from'], errors='coerce').astype('float32')
+        df['salary_to'] = pd.to_numeric(df['salary_to'], errors='coerce').astype('float32')
+        return df
+
+    @staticmethod
+    def _prepare_frame(df, currency_rates, matcher):
+        """
+        Разметка профессий и подготовка зарплат. Возвращает кадры всех и PHP
+        вакансий и число вакансий без курса валюты по кодам валют.
+        """
+        # Маски всех профессий за один проход по названиям
+        df['professions'] = matcher.tag(df['name'])
+        php_mask = matcher.selects(df['professions'], PRIMARY_PROFESSION)
+        # Названия после разметки больше не нужны
+        df = df.drop(columns='name')
 
         # Подготовка данных для зарплат
-        self._prepare_salary_data()
-
+        return DataProcessor._prepare_salary_data(df, php_mask, currency_rates)
 
-    def _prepare_salary_data(self):
+    @staticmethod
+    def _prepare_salary_data(df, php_mask, currency_rates):
         """Подготовка данных о зарплатах"""
-        # Словарь курсов валют
-        self.currency_rates = {
-            'USD': 90, 'EUR': 98, 'RUR': 1, 'RUB': 1,
-            'KZT': 0.15, 'BYR': 27, 'UAH': 2.5, 'GEL': 34
-        }
-
-        # Конвертация зарплат в рубли
-        self.df['salary_rub'] = self.df.apply(self._convert_salary_to_rub, axis=1)
-        self.php_df['salary_rub'] = self.php_df.apply(self._convert_salary_to_rub, axis=1)
-
-        # Удаление выбросов
-        salary_mask = self.df['salary_rub'] < 10000000
-        self.df = self.df[salary_mask]
-        self.php_df = self.php_df[self.php_df['salary_rub'] < 10000000]
-
-    def _convert_salary_to_rub(self, row):
-        """Конвертация зарплаты в рубли"""
-        if pd.isna(row['salary_from']) and pd.isna(row['salary_to']):
-            return None
-
-        salary_from = row['salary_from'] if not pd.isna(row['salary_from']) else 0
-        salary_to = row['salary_to'] if not pd.isna(row['salary_to']) else salary_from
-
-        if salary_from == 0 and salary_to == 0:
-            return None
-
-        avg_salary = (salary_from + salary_to) / 2 if salary_to != 0 else salary_from
-        currency = row['salary_currency']
-
-        if pd.isna(currency) or currency not in self.currency_rates:
-            return None
-
-        return avg_salary * self.currency_rates[currency]
+        # Конвертация зарплат в рубли; исходные зарплаты и даты больше не нужны
+        salary_rub = convert_salaries_to_rub(df, currency_rates)
+        missing_rates = missing_rate_counts(df, salary_rub)
+        df['salary_rub'] = salary_rub.astype('float32')
+        df = df.drop(columns=['salary_from', 'salary_to', 'published_at'])
+
+        # Удаление выбросов; PHP вакансии выделяются из уже сконвертированных данных
+        salary_mask = (df['salary_rub'] < 10000000).to_numpy()
+        # Индекс заново с нуля: RangeIndex не занимает памяти
+        df = df[salary_mask].reset_index(drop=True)
+        return df, df[php_mask[salary_mask]], missing_rates
+
+    @staticmethod
+    def _mean_and_count(df, by):
+        """Средняя зарплата (salary_rub) и число вакансий (name) по группам"""
+        return with_float64_salary(df).groupby(by, observed=True).agg(
+            salary_rub=('salary_rub', 'mean'),
+            name=('salary_rub', 'size')
+        ).round(2)
 
     def process_salary_statistics(self):
         """Обработка статистики зарплат"""
-        # Группировка данных
-        all_stats = self.df.groupby('year').agg({
-            'salary_rub': 'mean',
-            'name': 'count'
-        }).round(2)
+        if self.df is None:
+            return (
+                *self.all_aggregates.salary_statistics(),
+                *self.php_aggregates.salary_statistics()
+            )
 
-        php_stats = self.php_df.groupby('year').agg({
-            'salary_rub': 'mean',
-            'name': 'count'
-        }).round(2)
+        # Группировка данных
+        # Годы - обычные int64, как у потоковых агрегатов, а не Int16 столбца
+        all_stats = self._mean_and_count(self.df, 'year').rename(index=int)
+        php_stats = self._mean_and_count(self.php_df, 'year').rename(index=int)
 
         return (
             all_stats['salary_rub'],
@@ -101,83 +549,80 @@ class DataProcessor:
             php_stats['name']
         )
 
+    def process_salary_quantiles(self):
+        """Квантили зарплат по годам для всех и PHP вакансий (столбцы - подписи графика)"""
+        columns = {'salary_p25': '25%', 'salary_p50': 'Медиана', 'salary_p75': '75%', 'salary_p90': '90%'}
+        return tuple(
+            aggregates.distributions('year')[list(columns)].rename(columns=columns).rename_axis('year')
+            for aggregates in self.aggregates()
+        )
+
     def process_geography_data(self):
         """Обработка географических данных"""
+        if self.df is None:
+            return self.all_aggregates.geography_data(), self.php_aggregates.geography_data()
+
         def process_city_stats(df):
             total_vacancies = len(df)
-            city_stats = df.groupby('area_name').agg({
-                'salary_rub': 'mean',
-                'name': 'count'
-            }).round(2)
+            city_stats = self._mean_and_count(df, 'area_name')
+            city_stats.index = city_stats.index.astype(str)
             city_stats['vacancy_share'] = (city_stats['name'] / total_vacancies * 100).round(2)
             return city_stats[city_stats['name'] >= total_vacancies * 0.01]
 
         return process_city_stats(self.df), process_city_stats(self.php_df)
 
+    def process_geography_by_year(self):
+        """Статистика по городам за каждый год (индекс год, город)"""
+        if self.df is None:
+            return self.all_aggregates.geography_by_year(), self.php_aggregates.geography_by_year()
+
+        def process_city_year_stats(df):
+            city_stats = self._mean_and_count(df, ['year', 'area_name'])
+            return year_city_table(city_stats['salary_rub'], city_stats['name'], df.groupby('year').size())
+
+        return process_city_year_stats(self.df), process_city_year_stats(self.php_df)
+
+    def process_profession_statistics(self):
+        """Средняя зарплата и число вакансий по (профессия, год) для всего реестра"""
+        if self.df is None:
+            return self.all_aggregates.profession_statistics()
+        sums, _ = profession_year_sums(with_salary_columns(self.df), self.matcher)
+        return profession_year_table(sums)
+
+    def _skill_counts(self):
+        """Частоты навыков для всех и PHP вакансий из одного прохода"""
+        if self.df is None:
+            return self.all_aggregates.skill_counts, self.php_aggregates.skill_counts
+        if self._skills is None:
+            self._skills = SkillCounts.from_ids(
+                self.df['year'], self.skill_ids, [self.df.index.isin(self.php_df.index)]
+            )
+        return self._skills
+
     def process_skills(self):
         """Обработка навыков по годам"""
-        def process_skills_by_year(df):
-            skills_by_year = {}
-            for year in df['year'].unique():
-                year_df = df[df['year'] == year]
-                year_skills = year_df[year_df['key_skills'].notna()]['key_skills'].str.split('\n').explode()
-                if not year_skills.empty:
-                    skills_by_year[year] = year_skills.value_counts().head(20)
-            return skills_by_year
-
-        # Обработка для всех вакансий
-        all_skills_by_year = process_skills_by_year(self.df)
-
-        # Обработка для PHP вакансий
-        php_skills_by_year = process_skills_by_year(self.php_df)
-
-        return all_skills_by_year, php_skills_by_year
+        all_counts, php_counts = self._skill_counts()
+        return all_counts.top_by_year(20), php_counts.top_by_year(20)
 
+    def process_top_skills(self, top=20):
+        """ТОП навыков за все годы"""
+        all_counts, php_counts = self._skill_counts()
+        return all_counts.top_overall(top), php_counts.top_overall(top)
 
     def create_graph(self, data, title, filename, graph_type='line'):
         """Создание графиков"""
-        plt.figure(figsize=(12, 6))
-
-        plt.grid(True, linestyle='--', alpha=0.7)
-        plt.rcParams['font.size'] = 10
-
-        if graph_type == 'line':
-            plt.plot(data.index, data.values, marker='o', linewidth=2, color='#2c3e50')
-            plt.grid(True)
-            plt.xticks(rotation=45)
-        elif graph_type == 'bar':
-            colors = plt.cm.Set3(np.linspace(0, 1, len(data.head(20))))
-            data.head(20).plot(kind='bar', color=colors)
-            plt.xticks(rotation=45, ha='right')
-        elif graph_type == 'pie':
-            colors = plt.cm.Set3(np.linspace(0, 1, len(data.head(10))))
-            plt.pie(
-                data.head(10),
-                labels=data.head(10).index,
-                autopct='%1.1f%%',
-                startangle=90,
-                colors=colors
-            )
-
-        plt.title(title, pad=20, fontsize=12, fontweight='bold')
-        plt.tight_layout()
-
-        # Сохранение графика
-        graph_path = os.path.join(settings.MEDIA_ROOT, 'graphs', filename)
-        os.makedirs(os.path.dirname(graph_path), exist_ok=True)
-        plt.savefig(graph_path, dpi=300, bbox_inches='tight')
-        plt.close()
-
+        render_chart(data, title, os.path.join(settings.MEDIA_ROOT, 'graphs', filename), graph_type)
         return f'graphs/{filename}'
 
-    def create_all_graphs(self):
-        """Создание всех графиков"""
+    def create_all_graphs(self, workers=None):
+        """Создание всех графиков; workers - размер пула процессов отрисовки"""
         graphs = []
 
         # Получение данных
         salary_data = self.process_salary_statistics()
+        quantile_data = self.process_salary_quantiles()
         geo_data = self.process_geography_data()
-        skills_data = self.process_skills()
+        skills_data = self.process_top_skills()
 
         # Общая статистика
         graphs.append({
@@ -196,6 +641,14 @@ class DataProcessor:
             'is_general': True
         })
 
+        graphs.append({
+            'data': quantile_data[0],
+            'title': 'Квантили зарплат по годам',
+            'filename': 'general_salary_quantiles.png',
+            'graph_type': 'salary_quantiles',
+            'is_general': True
+        })
+
         graphs.append({
             'data': geo_data[0]['salary_rub'].sort_values(ascending=False),
             'title': 'Уровень зарплат по городам',
@@ -237,6 +690,14 @@ class DataProcessor:
             'is_general': False
         })
 
+        graphs.append({
+            'data': quantile_data[1],
+            'title': 'Квантили зарплат PHP-программиста по годам',
+            'filename': 'php_salary_quantiles.png',
+            'graph_type': 'salary_quantiles',
+            'is_general': False
+        })
+
         graphs.append({
             'data': geo_data[1]['salary_rub'].sort_values(ascending=False),
             'title': 'Уровень зарплат PHP-программиста по городам',
@@ -261,22 +722,17 @@ class DataProcessor:
             'is_general': False
         })
 
-        # Создаем все графики
-        result = []
+        # Создаем все графики; неизменившиеся не перерисовываются
         for graph in graphs:
-            graph_type = 'pie' if 'share' in graph['graph_type'] else 'bar' if 'skills' in graph['graph_type'] or 'geography_salary' in graph['graph_type'] else 'line'
-            file_path = self.create_graph(
-                graph['data'],
-                graph['title'],
-                graph['filename'],
-                graph_type
-            )
-            result.append({
+            graph['chart_type'] = 'pie' if 'share' in graph['graph_type'] else 'bar' if 'skills' in graph['graph_type'] or 'geography_salary' in graph['graph_type'] else 'line'
+        files = render_charts(graphs, os.path.join(settings.MEDIA_ROOT, 'graphs'), workers)
+
+        return [
+            {
                 'title': graph['title'],
-                'image': file_path,
+                'image': f'graphs/{filename}',
                 'graph_type': graph['graph_type'],
                 'is_general': graph['is_general']
-            })
-
-        return result
-
+            }
+            for graph, filename in zip(graphs, files)
+        ]
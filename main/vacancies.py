@@ -0,0 +1,162 @@
+import asyncio
+import contextvars
+import logging
+import threading
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .hh import get_async_client, get_client
+from .models import LastVacancy
+
+logger = logging.getLogger(__name__)
+
+# Лента в кэше хранится без срока: (момент загрузки, список вакансий)
+FEED_KEY = 'latest_php_vacancies'
+# Блокировка обновления: одновременно ленту загружает только один процесс
+FEED_LOCK_KEY = 'latest_php_vacancies:lock'
+# Блокировка снимается сама, если обновляющий процесс упал
+FEED_LOCK_TIMEOUT = 120
+
+
+def feed_max_age():
+    """Возраст ленты, после которого она считается устаревшей"""
+    return timedelta(seconds=getattr(settings, 'LATEST_VACANCIES_MAX_AGE', 900))
+
+
+def _feed_objects(items, fetched_at):
+    return [
+        LastVacancy(
+            title=item['title'],
+            description=item.get('description', ''),
+            skills=item['skills'],
+            company=item['company'],
+            salary_from=item['salary_from'],
+            salary_to=item['salary_to'],
+            salary_currency=item['salary_currency'] or '',
+            region=item['region'],
+            published_at=item['published_at'],
+            fetched_at=fetched_at,
+        )
+        for item in items
+    ]
+
+
+def _store_feed(vacancies):
+    with transaction.atomic():
+        LastVacancy.objects.all().delete()
+        LastVacancy.objects.bulk_create(vacancies)
+
+
+def refresh_feed(client=None):
+    """
+    Загрузка ленты из API hh.ru и её атомарная замена в БД и в кэше.
+    Возвращает число сохранённых вакансий.
+    """
+    fetched_at = timezone.now()
+    vacancies = _feed_objects((client or get_client()).latest_vacancies(), fetched_at)
+    _store_feed(vacancies)
+    cache.set(FEED_KEY, (fetched_at, vacancies), None)
+    return len(vacancies)
+
+
+async def arefresh_feed(client=None):
+    """Асинхронная версия refresh_feed с асинхронным HTTP-клиентом"""
+    fetched_at = timezone.now()
+    vacancies = _feed_objects(await (client or get_async_client()).latest_vacancies(), fetched_at)
+    # Асинхронный ORM не поддерживает транзакции, запись выполняется в потоке
+    await sync_to_async(_store_feed)(vacancies)
+    await cache.aset(FEED_KEY, (fetched_at, vacancies), None)
+    return len(vacancies)
+
+
+def refresh_feed_locked(client=None):
+    """
+    Обновление ленты под блокировкой (single-flight).
+    Возвращает число вакансий или None, если обновление уже идёт.
+    """
+    if not cache.add(FEED_LOCK_KEY, True, FEED_LOCK_TIMEOUT):
+        return None
+    try:
+        return refresh_feed(client)
+    finally:
+        cache.delete(FEED_LOCK_KEY)
+
+
+async def arefresh_feed_locked(client=None):
+    """Асинхронная версия refresh_feed_locked"""
+    if not await cache.aadd(FEED_LOCK_KEY, True, FEED_LOCK_TIMEOUT):
+        return None
+    try:
+        return await arefresh_feed(client)
+    finally:
+        await cache.adelete(FEED_LOCK_KEY)
+
+
+# Цикл событий фоновых обновлений и последнее запущенное обновление
+_loop = None
+_loop_lock = threading.Lock()
+_revalidation = None
+
+
+def _background_loop():
+    """
+    Долгоживущий цикл событий в отдельном потоке. Под WSGI async_to_sync
+    создаёт цикл на один запрос и отменяет оставшиеся задачи, поэтому фоновое
+    обновление идёт не в цикле запроса. Асинхронный клиент hh.ru привязан
+    к этому циклу, и его пул соединений переиспользуется между обновлениями.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='latest-vacancies', daemon=True).start()
+    return _loop
+
+
+async def _arevalidate():
+    try:
+        await arefresh_feed_locked()
+    except Exception:
+        # Ошибка API не должна останавливать цикл: останется прежняя лента
+        logger.exception('Latest vacancies refresh failed')
+    finally:
+        await sync_to_async(close_old_connections)()
+
+
+async def astart_revalidation():
+    """Фоновое обновление устаревшей ленты, если оно ещё не запущено"""
+    global _revalidation
+    if await cache.aget(FEED_LOCK_KEY) is None:
+        # Задача не должна наследовать контекст запроса: в нём исполнитель
+        # async_to_sync, который завершится вместе с запросом
+        _revalidation = contextvars.Context().run(
+            asyncio.run_coroutine_threadsafe, _arevalidate(), _background_loop()
+        )
+
+
+def _is_stale(fetched_at):
+    return fetched_at is None or timezone.now() - fetched_at > feed_max_age()
+
+
+async def alatest_feed():
+    """
+    Лента последних вакансий из кэша или БД, без обращения к API.
+    Устаревшая лента отдаётся сразу, а обновляется в фоне (stale-while-revalidate).
+    """
+    feed = await cache.aget(FEED_KEY)
+    if feed is None:
+        vacancies = [vacancy async for vacancy in LastVacancy.objects.aiterator()]
+        fetched_at = max((vacancy.fetched_at for vacancy in vacancies), default=None)
+        feed = (fetched_at, vacancies)
+        if fetched_at is not None:
+            await cache.aset(FEED_KEY, feed, None)
+
+    fetched_at, vacancies = feed
+    if _is_stale(fetched_at):
+        await astart_revalidation()
+    return vacancies
@@ -1,14 +1,16 @@
 from django.shortcuts import render
-from django.core.cache import cache
-from .models import MainPage, SalaryStatistics, GeographyData, Skill, Graph
-import requests
-from datetime import datetime
-
-def index(request):
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import condition, require_GET
+from django.views.static import serve
+from .models import MainPage
+from .pages import aactive_version, aselected_year, astatistics_data, cache_statistics_page
+from .vacancies import alatest_feed
+
+async def index(request):
     """Представление главной страницы"""
-    main_info = MainPage.objects.first()
+    main_info = await MainPage.objects.afirst()
     if not main_info:
-        main_info = MainPage.objects.create(
+        main_info = await MainPage.objects.acreate(
             title="PHP-программист",
             description="пук-пук-пук-пук",
             image="/media/profession_images/default.jpg"
@@ -20,103 +22,81 @@ def index(request):
     return render(request, 'main/index.html', context)
 
 
-def general_statistics(request):
+def _year_context(data, year):
+    """Выбранный год и годы, доступные для среза географии"""
+    return {
+        'year': year,
+        'years': data.years,
+    }
+
+
+@cache_statistics_page
+async def general_statistics(request):
     """Представление общей статистики"""
+    year = await aselected_year(request)
+    data = await astatistics_data(year)
     context = {
+        **_year_context(data, year),
+
         # Статистика зарплат
-        'salary_statistics': SalaryStatistics.objects.filter(
-            is_general=True
-        ).order_by('year'),
-        'salary_graphs': Graph.objects.filter(
-            graph_type='salary',
-            is_general=True
-        ),
+        'salary_statistics': data.salary[True],
+        'salary_graphs': data.graphs_of('salary', True),
+        'salary_quantile_graphs': data.graphs_of('salary_quantiles', True),
 
         # Статистика количества вакансий
-        'vacancy_count_statistics': SalaryStatistics.objects.filter(
-            is_general=True
-        ).order_by('year'),
-        'demand_graphs': Graph.objects.filter(
-            graph_type='demand',
-            is_general=True
-        ),
+        'vacancy_count_statistics': data.salary[True],
+        'demand_graphs': data.graphs_of('demand', True),
 
         # Статистика по городам (зарплаты)
-        'city_salary_statistics': GeographyData.objects.filter(
-            is_general=True
-        ).order_by('-average_salary'),
-        'geography_salary_graphs': Graph.objects.filter(
-            graph_type='geography_salary',
-            is_general=True
-        ),
+        'city_salary_statistics': data.city_salary[True],
+        'geography_salary_graphs': data.graphs_of('geography_salary', True),
 
         # Статистика по городам (доли)
-        'city_share_statistics': GeographyData.objects.filter(
-            is_general=True
-        ).order_by('-vacancy_share'),
-        'geography_share_graphs': Graph.objects.filter(
-            graph_type='geography_share',
-            is_general=True
-        ),
+        'city_share_statistics': data.city_share[True],
+        'geography_share_graphs': data.graphs_of('geography_share', True),
 
         # Статистика навыков
-        'skills_statistics': Skill.objects.filter(
-            is_general=True
-        ).order_by('-count')[:20],
-        'skills_graphs': Graph.objects.filter(
-            graph_type='skills',
-            is_general=True
-        ),
+        'skills_statistics': data.skills[True][:20],
+        'skills_graphs': data.graphs_of('skills', True),
     }
     return render(request, 'main/general_statistics.html', context)
 
-def demand(request):
+@cache_statistics_page
+async def demand(request):
     """Представление востребованности (PHP)"""
+    data = await astatistics_data()
     context = {
-        'php_salary_statistics': SalaryStatistics.objects.filter(
-            is_general=False
-        ).order_by('year'),
-        'php_salary_graphs': Graph.objects.filter(
-            graph_type='salary',
-            is_general=False
-        ),
-        'php_vacancy_statistics': SalaryStatistics.objects.filter(
-            is_general=False
-        ).order_by('year'),
-        'php_demand_graphs': Graph.objects.filter(
-            graph_type='demand',
-            is_general=False
-        ),
+        'php_salary_statistics': data.salary[False],
+        'php_salary_graphs': data.graphs_of('salary', False),
+        'php_salary_quantile_graphs': data.graphs_of('salary_quantiles', False),
+        'php_vacancy_statistics': data.salary[False],
+        'php_demand_graphs': data.graphs_of('demand', False),
     }
     return render(request, 'main/demand.html', context)
 
-def geography(request):
+@cache_statistics_page
+async def geography(request):
     """Представление географии (PHP)"""
+    year = await aselected_year(request)
+    data = await astatistics_data(year)
     context = {
-        'php_city_salary_statistics': GeographyData.objects.filter(
-            is_general=False
-        ).order_by('-average_salary'),
-        'php_city_share_statistics': GeographyData.objects.filter(
-            is_general=False
-        ).order_by('-vacancy_share'),
-        'php_salary_city_graphs': Graph.objects.filter(
-            graph_type='geography_salary',
-            is_general=False
-        ),
-        'php_geography_graphs': Graph.objects.filter(
-            graph_type='geography_share',
-            is_general=False
-        ),
+        **_year_context(data, year),
+        'php_city_salary_statistics': data.city_salary[False],
+        'php_city_share_statistics': data.city_share[False],
+        'php_salary_city_graphs': data.graphs_of('geography_salary', False),
+        'php_geography_graphs': data.graphs_of('geography_share', False),
     }
     return render(request, 'main/geography.html', context)
 
-def skills(request):
+@cache_statistics_page
+async def skills(request):
     """Представление навыков (PHP)"""
-    all_php_skills = Skill.objects.filter(is_general=False)
+    data = await astatistics_data()
+    all_php_skills = data.skills[False]
     total_mentions = sum(skill.count for skill in all_php_skills)
 
     skills_with_percentage = []
-    for skill in all_php_skills.order_by('-count')[:20]:
+    for skill in all_php_skills[:20]:
         percentage = (skill.count / total_mentions * 100) if total_mentions > 0 else 0
         skills_with_percentage.append({
             'name': skill.name,
@@ -126,78 +106,137 @@ def skills(request):
 
     context = {
         'php_skills_statistics': skills_with_percentage,
-        'php_skills_graphs': Graph.objects.filter(
-            graph_type='skills',
-            is_general=False
-        ),
+        'php_skills_graphs': data.graphs_of('skills', False),
     }
     return render(request, 'main/skills.html', context)
 
-def latest_vacancies(request):
+# Статистики JSON API: имя -> (тип графика, лимит точек, заголовки для общей и PHP статистики)
+STATISTICS = {
+    'salary-by-year': ('line', None, 'Динамика уровня зарплат по годам',
+                       'Динамика уровня зарплат PHP-программиста по годам'),
+    'salary-quantiles-by-year': ('line', None, 'Квантили зарплат по годам',
+                                 'Квантили зарплат PHP-программиста по годам'),
+    'count-by-year': ('line', None, 'Динамика количества вакансий по годам',
+                      'Динамика количества вакансий PHP-программиста по годам'),
+    'city-salary': ('bar', 20, 'Уровень зарплат по городам',
+                    'Уровень зарплат PHP-программиста по городам'),
+    'city-share': ('pie', 10, 'Доля вакансий по городам',
+                   'Доля вакансий PHP-программиста по городам'),
+    'skills': ('bar', 20, 'ТОП-20 навыков', 'ТОП-20 навыков PHP-программиста'),
+}
+
+SCOPES = {'general': True, 'php': False}
+
+# Статистики, доступные для любой профессии реестра (scope - код профессии)
+PROFESSION_STATISTICS = {'salary-by-year', 'salary-quantiles-by-year', 'count-by-year'}
+
+# Ряды графика квантилей: поле статистики -> подпись
+QUANTILE_SERIES = [
+    ('salary_p25', '25%'), ('salary_p50', 'Медиана'), ('salary_p75', '75%'), ('salary_p90', '90%'),
+]
+
+
+def _year_stats(data, statistic, scope):
+    """Статистика по годам области scope или None, если её нет"""
+    if scope in SCOPES:
+        return data.salary[SCOPES[scope]]
+    profession = data.professions.get(scope)
+    if profession is None or statistic not in PROFESSION_STATISTICS:
+        return None
+    return profession['statistics']
+
+
+def _statistic_rows(data, statistic, scope):
+    """Пары (подпись, значение) статистики или None, если её нет"""
+    if statistic.endswith('-by-year'):
+        stats = _year_stats(data, statistic, scope)
+        if stats is None:
+            return None
+        if statistic == 'salary-by-year':
+            return [(stat.year, stat.average_salary) for stat in stats]
+        elif statistic == 'salary-quantiles-by-year':
+            # Основное значение - медиана; остальные квантили - в series
+            return [(stat.year, stat.salary_p50) for stat in stats if stat.salary_p50 is not None]
+        return [(stat.year, stat.vacancy_count) for stat in stats]
+    if scope not in SCOPES:
+        return None
+
+    is_general = SCOPES[scope]
+    if statistic == 'city-salary':
+        return [(city.city, city.average_salary) for city in data.city_salary[is_general]]
+    elif statistic == 'city-share':
+        return [(city.city, city.vacancy_share) for city in data.city_share[is_general]]
+    return [(skill.name, skill.count) for skill in data.skills[is_general][:20]]
+
+
+# Функции condition синхронные, поэтому версия данных и год читаются заранее
+# в statistics_api и передаются через request
+
+def _stats_etag(request, scope, statistic):
+    version, year = request.statistics_version, request.statistics_year
+    return f'{version[0] if version else 0}-{scope}-{statistic}-{"all" if year is None else year}'
+
+
+def _stats_last_modified(request, scope, statistic):
+    version = request.statistics_version
+    return version[1] if version else None
+
+
+@require_GET
+async def statistics_api(request, scope, statistic):
+    """JSON с данными одного графика статистики (общей, PHP или профессии реестра)"""
+    if statistic not in STATISTICS:
+        raise Http404('Unknown statistic')
+
+    request.statistics_version = await aactive_version()
+    # Срез по году есть только у статистики по городам
+    request.statistics_year = await aselected_year(request) if statistic.startswith('city-') else None
+    return await _statistics_json(request, scope, statistic)
+
+
+@condition(etag_func=_stats_etag, last_modified_func=_stats_last_modified)
+async def _statistics_json(request, scope, statistic):
+    chart, limit, general_title, php_title = STATISTICS[statistic]
+    year = request.statistics_year
+    data = await astatistics_data(year)
+    rows = _statistic_rows(data, statistic, scope)
+    if rows is None:
+        raise Http404('Unknown statistic')
+
+    if scope in SCOPES:
+        title = general_title if SCOPES[scope] else php_title
+    else:
+        title = f"{general_title}: {data.professions[scope]['name']}"
+    payload = {
+        'scope': scope,
+        'statistic': statistic,
+        'title': title,
+        'chart': chart,
+        'limit': limit,
+        'year': year,
+        'labels': [label for label, _ in rows],
+        'values': [float(value) for _, value in rows],
+    }
+    if statistic == 'salary-quantiles-by-year':
+        stats = [stat for stat in _year_stats(data, statistic, scope) if stat.salary_p50 is not None]
+        payload['series'] = [
+            {'name': name, 'values': [getattr(stat, field) for stat in stats]}
+            for field, name in QUANTILE_SERIES
+        ]
+    return JsonResponse(payload)
+
+async def latest_vacancies(request):
     """Представление последних вакансий"""
-    # Кэшированные вакансии
-    vacancies = cache.get('latest_php_vacancies')
-
-    if vacancies is None:
-        try:
-            params = {
-                'text': 'PHP OR ПХП OR РНР',
-                'period': 1,
-                'per_page': 10,
-                'order_by': 'publication_time',
-            }
-
-            response = requests.get('https://api.hh.ru/vacancies', params=params)
-            response.raise_for_status()
-
-            data = response.json()
-            vacancies = []
-
-            # Обработка каждой вакансии
-            for item in data['items']:
-                vacancy = {
-                    'title': item['name'],
-                    'company': item['employer']['name'],
-                    'region': item['area']['name'],
-                    'published_at': datetime.strptime(
-                        item['published_at'],
-                        '%Y-%m-%dT%H:%M:%S%z'
-                    ),
-                    'skills': '',
-                    'salary_from': None,
-                    'salary_to': None,
-                    'salary_currency': None,
-                }
-
-                if item['salary']:
-                    vacancy['salary_from'] = item['salary']['from']
-                    vacancy['salary_to'] = item['salary']['to']
-                    vacancy['salary_currency'] = item['salary']['currency']
-
-                # Дополнительный запрос для получения детальной информации
-                try:
-                    detailed_response = requests.get(f"https://api.hh.ru/vacancies/{item['id']}")
-                    detailed_response.raise_for_status()
-                    detailed_data = detailed_response.json()
-
-                    if detailed_data.get('key_skills'):
-                        skills = [skill['name'] for skill in detailed_data['key_skills']]
-                        vacancy['skills'] = ', '.join(skills)
-
-                    vacancy['description'] = detailed_data.get('description', '')
-
-                except requests.RequestException:
-                    pass
-
-                vacancies.append(vacancy)
-
-            # Кэшируем результат на 15 минут
-            cache.set('latest_php_vacancies', vacancies, 900)
-
-        except requests.RequestException:
-            vacancies = []
-
+    # Лента обновляется командой refresh_vacancies или в фоне;
+    # запрос только читает кэш или БД
     context = {
-        'vacancies': vacancies
+        'vacancies': await alatest_feed()
     }
     return render(request, 'main/latest_vacancies.html', context)
+
+
+def immutable_media(request, path, document_root=None):
+    """Отдача файлов с хэшем в имени с долгим кэшированием (для разработки)"""
+    response = serve(request, path, document_root=document_root)
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
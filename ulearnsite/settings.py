@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -131,9 +132,37 @@ MEDIA_ROOT = BASE_DIR / "media"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+# Общий для всех процессов кэш в файле SQLite (CACHE_BACKEND=sqlite)
+# или отдельный кэш в памяти каждого процесса (CACHE_BACKEND=locmem)
+if os.environ.get('CACHE_BACKEND', 'sqlite') == 'locmem':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'unique-snowflake',
+        }
     }
-}
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'main.cache.SQLiteCache',
+            # Рядом с БД проекта, а не в общем /tmp
+            'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / 'cache.sqlite3')),
+            'OPTIONS': {
+                'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 10000)),
+                'MAX_BYTES': int(os.environ.get('CACHE_MAX_BYTES', 256 * 1024 * 1024)),
+                'L1_ENTRIES': int(os.environ.get('CACHE_L1_ENTRIES', 128)),
+                'L1_TIMEOUT': float(os.environ.get('CACHE_L1_TIMEOUT', 5)),
+                'ACCESS_RESOLUTION': float(os.environ.get('CACHE_ACCESS_RESOLUTION', 30)),
+            },
+        }
+    }
+
+# Тесты используют отдельный временный файл кэша
+TEST_RUNNER = 'main.test_runner.IsolatedCacheRunner'
+
+# API hh.ru для страницы последних вакансий
+HH_API_URL = 'https://api.hh.ru'
+HH_API_TIMEOUT = (3.05, 10)
+HH_API_CONCURRENCY = 10
+# Лента старше этого возраста (в секундах) обновляется в фоне
+LATEST_VACANCIES_MAX_AGE = 900
@@ -15,11 +15,22 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
 from django.conf import settings
 from django.conf.urls.static import static
+from main.views import immutable_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('main.urls')),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+]
+
+if settings.DEBUG:
+    # Графики с хэшем в имени не меняются и кэшируются браузером надолго
+    urlpatterns.append(re_path(
+        r'^media/(?P<path>graphs/[\w-]+\.[0-9a-f]{12}\.png)$',
+        immutable_media,
+        {'document_root': settings.MEDIA_ROOT},
+    ))
+
+urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)